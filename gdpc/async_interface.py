@@ -0,0 +1,89 @@
+"""Provides asynchronous wrappers for the endpoints of the GDMC HTTP interface.
+
+The functions in this module mirror those in `interface`, but are coroutines. This allows many
+independent requests to be sent concurrently, for example with `asyncio.gather()`.
+
+The requests are performed on a shared thread pool, and use the same persistent connection pools
+as the functions in `interface`.
+"""
+
+
+from typing import Sequence, Tuple, Optional, Iterable, Callable, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import threading
+
+from .vector_tools import Vec2iLike, Vec3iLike
+from .block import Block
+from . import interface
+from .interface import DEFAULT_HOST
+
+
+T = TypeVar("T")
+
+
+MAX_CONCURRENT_REQUESTS = 32
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executorLock = threading.Lock()
+
+
+def _getExecutor():
+    """Returns the thread pool used to perform requests, creating it if it does not exist yet."""
+    global _executor # pylint: disable=global-statement
+    with _executorLock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(MAX_CONCURRENT_REQUESTS, thread_name_prefix="gdpc-request")
+        return _executor
+
+
+async def _run(function: Callable[..., T], *args, **kwargs) -> T:
+    """Runs <function>(*<args>, **<kwargs>) on the request thread pool and awaits its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_getExecutor(), partial(function, *args, **kwargs))
+
+
+async def getBlocks(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension: Optional[str] = None, includeState=True, includeData=True, retries=0, timeout=None, host=DEFAULT_HOST):
+    """Asynchronous version of `interface.getBlocks()`."""
+    return await _run(interface.getBlocks, position, size, dimension=dimension, includeState=includeState, includeData=includeData, retries=retries, timeout=timeout, host=host)
+
+
+async def getBiomes(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension: Optional[str] = None, retries=0, timeout=None, host=DEFAULT_HOST):
+    """Asynchronous version of `interface.getBiomes()`."""
+    return await _run(interface.getBiomes, position, size, dimension=dimension, retries=retries, timeout=timeout, host=host)
+
+
+async def placeBlocks(blocks: Sequence[Tuple[Vec3iLike, Block]], dimension: Optional[str] = None, doBlockUpdates=True, spawnDrops=False, customFlags: str = "", retries=0, timeout=None, host=DEFAULT_HOST):
+    """Asynchronous version of `interface.placeBlocks()`."""
+    return await _run(interface.placeBlocks, blocks, dimension=dimension, doBlockUpdates=doBlockUpdates, spawnDrops=spawnDrops, customFlags=customFlags, retries=retries, timeout=timeout, host=host)
+
+
+async def runCommand(command: str, dimension: Optional[str] = None, retries=0, timeout=None, host=DEFAULT_HOST):
+    """Asynchronous version of `interface.runCommand()`."""
+    return await _run(interface.runCommand, command, dimension=dimension, retries=retries, timeout=timeout, host=host)
+
+
+async def getChunks(position: Vec2iLike, size: Optional[Vec2iLike] = None, dimension: Optional[str] = None, asBytes=False, retries=0, timeout=None, host=DEFAULT_HOST):
+    """Asynchronous version of `interface.getChunks()`."""
+    return await _run(interface.getChunks, position, size, dimension=dimension, asBytes=asBytes, retries=retries, timeout=timeout, host=host)
+
+
+def gatherPlaceBlocks(batches: Iterable[Sequence[Tuple[Vec3iLike, Block]]], dimension: Optional[str] = None, doBlockUpdates=True, spawnDrops=False, customFlags: str = "", retries=0, timeout=None, host=DEFAULT_HOST):
+    """Places multiple batches of blocks concurrently, and blocks until all of them are placed.
+
+    Each element of <batches> is a sequence of blocks as accepted by `interface.placeBlocks()`.
+    Note that the order in which the batches are placed is not defined.
+
+    Must not be called from a running event loop; use `placeBlocks()` with `asyncio.gather()`
+    instead in that case.
+
+    Returns a list with the result of `interface.placeBlocks()` for each batch.
+    """
+    async def placeAll():
+        return await asyncio.gather(*(
+            placeBlocks(batch, dimension=dimension, doBlockUpdates=doBlockUpdates, spawnDrops=spawnDrops, customFlags=customFlags, retries=retries, timeout=timeout, host=host)
+            for batch in batches
+        ))
+    return asyncio.run(placeAll())
@@ -0,0 +1,218 @@
+"""Provides the ChunkCache class"""
+
+
+from typing import List, Optional, Tuple
+from concurrent import futures
+import threading
+import logging
+
+from glm import ivec2
+from nbt import nbt
+
+from .utils import OrderedByLookupDict
+from .vector_tools import Vec2iLike, Rect, loop2D
+from . import interface
+from . import async_interface
+from .nbt_tools import parseNbt, parseNbtStream
+
+
+logger = logging.getLogger(__name__)
+
+
+_ChunkKey = Tuple[str, Optional[str], int, int]
+
+
+def getChunkTags(chunkRect: Rect, dimension: Optional[str] = None, parallelRequests = 1, retries=0, timeout=None, host=interface.DEFAULT_HOST) -> List[nbt.TAG_Compound]:
+    """Retrieves the chunk tags of all chunks in <chunkRect> (in chunk coordinates), in the same
+    order as the "Chunks" list returned by the GDMC HTTP interface.\n
+    If <parallelRequests> is larger than one, <chunkRect> is split into up to that many strips,
+    which are requested concurrently. This can be faster for large areas."""
+    strips = min(parallelRequests, chunkRect.size.y)
+
+    if strips <= 1:
+        with interface.getChunksStream(chunkRect.offset, chunkRect.size, dimension=dimension, retries=retries, timeout=timeout, host=host) as chunkStream:
+            return parseNbtStream(chunkStream)["Chunks"].tags
+
+    # The chunks are ordered by z first, so strips along the x-axis can simply be concatenated.
+    stripRects: List[Rect] = []
+    for i in range(strips):
+        zBegin = chunkRect.size.y * i       // strips
+        zEnd   = chunkRect.size.y * (i + 1) // strips
+        stripRects.append(Rect((chunkRect.offset.x, chunkRect.offset.y + zBegin), (chunkRect.size.x, zEnd - zBegin)))
+
+    # The requests are submitted to the request thread pool directly (instead of through an event
+    # loop), so that this also works when called from a running event loop.
+    def requestStrip(stripRect: Rect) -> bytes:
+        return interface.getChunks(stripRect.offset, stripRect.size, dimension=dimension, asBytes=True, retries=retries, timeout=timeout, host=host)
+
+    chunks: List[nbt.TAG_Compound] = []
+    for stripBytes in async_interface._getExecutor().map(requestStrip, stripRects): # pylint: disable=protected-access
+        chunks += parseNbt(stripBytes)["Chunks"].tags
+    return chunks
+
+
+class ChunkCache:
+    """A least-recently-used cache of chunk data, used to speed up WorldSlice construction.
+
+    Chunks are stored per host, dimension and chunk position. When a WorldSlice is constructed
+    with a ChunkCache, only the chunks that are not cached yet are requested from the GDMC HTTP
+    interface.
+
+    If <prefetchMargin> is larger than zero, the chunks in a border of <prefetchMargin> chunks
+    around each requested area are also fetched, on a background thread. This speeds up the
+    construction of a later WorldSlice for a nearby or expanded area. Call .close() (or use the
+    cache as a context manager) when you are done with it, so that pending prefetches are cancelled
+    instead of delaying interpreter exit.
+
+    The cache assumes that the cached chunks do not change. Call .invalidate() or .clear() when the
+    world changes; an `editor.Editor` with a chunk cache does this automatically for the blocks it
+    places.
+
+    Note that the cached chunk tags are shared between all WorldSlices that are constructed with
+    this cache, so they should not be modified.
+    """
+
+    def __init__(self, maxSize = 1024, prefetchMargin = 0, parallelRequests = 1):
+        """Constructs a ChunkCache that holds up to <maxSize> chunks (0 means unlimited).\n
+        <parallelRequests> is passed to getChunkTags() when chunks are retrieved."""
+        self._chunks = OrderedByLookupDict[_ChunkKey, nbt.TAG_Compound](maxSize)
+        self._lock = threading.Lock()
+        # Incremented on every invalidation, so that fetches that overlap with an invalidation can
+        # detect that their data may be outdated.
+        self._generation = 0
+        self.prefetchMargin = prefetchMargin
+        self.parallelRequests = parallelRequests
+        self._prefetchExecutor: Optional[futures.ThreadPoolExecutor] = None
+        self._prefetchFutures: List[futures.Future] = []
+
+
+    def __len__(self):
+        return len(self._chunks)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def close(self):
+        """Stops background prefetching: cancels the queued prefetches and shuts down the prefetch
+        thread without waiting for a running prefetch to finish.\n
+        The cache itself remains usable; prefetching resumes when chunks are requested again."""
+        with self._lock:
+            executor = self._prefetchExecutor
+            self._prefetchExecutor = None
+            prefetchFutures = self._prefetchFutures
+            self._prefetchFutures = []
+        # Equivalent to shutdown(cancel_futures=True), which requires Python 3.9.
+        for future in prefetchFutures:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+    @property
+    def maxSize(self):
+        """The maximum amount of cached chunks (0 means unlimited)"""
+        return self._chunks.maxSize
+
+    @maxSize.setter
+    def maxSize(self, value: int):
+        with self._lock:
+            self._chunks.maxSize = value
+
+
+    def invalidate(self, chunkPosition: Vec2iLike, dimension: Optional[str] = None, host=interface.DEFAULT_HOST):
+        """Removes the chunk at <chunkPosition> (in chunk coordinates) from the cache."""
+        with self._lock:
+            self._generation += 1
+            self._chunks.pop((host, dimension, chunkPosition[0], chunkPosition[1]), None)
+
+
+    def clear(self):
+        """Removes all chunks from the cache."""
+        with self._lock:
+            self._generation += 1
+            self._chunks.clear()
+
+
+    def getChunks(self, chunkRect: Rect, dimension: Optional[str] = None, retries=0, timeout=None, host=interface.DEFAULT_HOST):
+        """Returns the chunk tags of all chunks in <chunkRect> (in chunk coordinates), in the same
+        order as the "Chunks" list returned by the GDMC HTTP interface.\n
+        Chunks that are not cached are retrieved and added to the cache."""
+        chunks = self._getChunks(chunkRect, dimension, retries, timeout, host)
+        if self.prefetchMargin > 0:
+            self._prefetchAround(chunkRect, dimension, retries, timeout, host)
+        return chunks
+
+
+    def _getChunks(self, chunkRect: Rect, dimension: Optional[str], retries: int, timeout, host: str):
+        """Like getChunks(), but without prefetching."""
+        chunks: List[Optional[nbt.TAG_Compound]] = []
+        missing: List[ivec2] = []
+        with self._lock:
+            for z in range(chunkRect.size.y):
+                for x in range(chunkRect.size.x):
+                    key = (host, dimension, chunkRect.offset.x + x, chunkRect.offset.y + z)
+                    chunk = self._chunks[key] if key in self._chunks else None
+                    if chunk is None:
+                        missing.append(ivec2(x, z))
+                    chunks.append(chunk)
+
+        if missing:
+            fetchRect = Rect.bounding(missing)
+            fetched = self._fetch(fetchRect.translated(chunkRect.offset), dimension, retries, timeout, host)
+            for pos in loop2D(fetchRect.size):
+                chunk = fetched[pos.x + pos.y * fetchRect.size.x]
+                localPos = fetchRect.offset + pos
+                chunks[localPos.x + localPos.y * chunkRect.size.x] = chunk
+
+        return chunks
+
+
+    def _fetch(self, chunkRect: Rect, dimension: Optional[str], retries: int, timeout, host: str):
+        """Retrieves the chunks in <chunkRect> and adds them to the cache.\n
+        Returns their chunk tags."""
+        generation = self._generation
+        chunks = getChunkTags(chunkRect, dimension, self.parallelRequests, retries, timeout, host)
+        with self._lock:
+            # If the cache was invalidated during the request, the data may already be outdated.
+            if self._generation == generation:
+                for pos in loop2D(chunkRect.size):
+                    x, z = chunkRect.offset + pos
+                    self._chunks[(host, dimension, x, z)] = chunks[pos.x + pos.y * chunkRect.size.x]
+        return chunks
+
+
+    def _prefetchAround(self, chunkRect: Rect, dimension: Optional[str], retries: int, timeout, host: str):
+        """Fetches the chunks in a border of self.prefetchMargin chunks around <chunkRect> on a
+        background thread."""
+        margin = self.prefetchMargin
+        outer = chunkRect.dilated(margin)
+        strips = [
+            Rect(outer.offset,                         (outer.size.x, margin)),     # Low z
+            Rect((outer.offset.x, chunkRect.end.y),    (outer.size.x, margin)),     # High z
+            Rect((outer.offset.x, chunkRect.offset.y), (margin, chunkRect.size.y)), # Low x
+            Rect((chunkRect.end.x, chunkRect.offset.y), (margin, chunkRect.size.y)), # High x
+        ]
+
+        def task():
+            for strip in strips:
+                # Stop early if the cache was closed in the meantime.
+                if self._prefetchExecutor is not executor:
+                    return
+                try:
+                    self._getChunks(strip, dimension, retries, timeout, host)
+                except Exception as e: # pylint: disable=broad-except
+                    logger.warning("Failed to prefetch chunks in %s:\n  %s", strip, e)
+                    return
+
+        with self._lock:
+            if self._prefetchExecutor is None:
+                self._prefetchExecutor = futures.ThreadPoolExecutor(1, thread_name_prefix="gdpc-chunk-prefetch")
+            executor = self._prefetchExecutor
+            self._prefetchFutures = [future for future in self._prefetchFutures if not future.done()]
+            self._prefetchFutures.append(executor.submit(task))
@@ -19,6 +19,7 @@ from .transform import Transform, TransformLike, toTransform
 from .block import Block, transformedBlockOrPalette
 from . import interface
 from .world_slice import WorldSlice
+from .chunk_cache import ChunkCache
 
 
 logger = logging.getLogger(__name__)
@@ -45,6 +46,7 @@ class Editor:
         retries               = 4,
         timeout               = None,
         host                  = interface.DEFAULT_HOST,
+        chunkCache: Optional[ChunkCache] = None,
     ):
         """Constructs an Editor instance with the specified transform and settings"""
         self._retries = retries
@@ -76,6 +78,8 @@ class Editor:
         self._worldSlice: Optional[WorldSlice] = None
         self._worldSliceDecay: Optional[np.ndarray] = None
 
+        self._chunkCache = chunkCache
+
 
     def __del__(self):
         """Cleans up this Editor instance"""
@@ -252,6 +256,17 @@ class Editor:
             self._worldSliceDecay = None
         self._host = value
 
+    @property
+    def chunkCache(self):
+        """The chunk cache used when loading world slices, or None\n
+        Chunks in the cache are invalidated when this editor places blocks in them. Like the cached
+        world slice, the chunk cache assumes that nothing besides this editor changes the world."""
+        return self._chunkCache
+
+    @chunkCache.setter
+    def chunkCache(self, value: Optional[ChunkCache]):
+        self._chunkCache = value
+
     @property
     def worldSlice(self):
         """The cached WorldSlice"""
@@ -392,11 +407,17 @@ class Editor:
         """Places <block> at <position>.\n
         <position> is interpreted as local to the coordinate system defined by self.transform.\n
         If <position> is iterable (e.g. a list), <block> is placed at all positions.
-        This is slightly more efficient than calling this method in a loop.\n
+        This is slightly more efficient than calling this method in a loop, and an (n,3) numpy
+        array of positions is transformed all at once.\n
         If <block> is a sequence (e.g. a list), blocks are sampled randomly.\n
         Returns whether the placement succeeded fully."""
         # Distinguising between Vec3iLike and Iterable[Vec3iLike] is... not easy.
-        globalPosition = self.transform * position if hasattr(position, "__len__") and len(position) == 3 and isinstance(position[0], Integral) else (self.transform * pos for pos in position)
+        if hasattr(position, "__len__") and len(position) == 3 and isinstance(position[0], Integral):
+            globalPosition = self.transform * position
+        elif isinstance(position, np.ndarray):
+            globalPosition = self.transform.applyArray(position)
+        else:
+            globalPosition = (self.transform * pos for pos in position)
         globalBlock = transformedBlockOrPalette(block, self.transform.rotation, self.transform.flip)
         return self.placeBlockGlobal(globalPosition, globalBlock, replace)
 
@@ -418,11 +439,72 @@ class Editor:
 
         oldBuffering = self.buffering
         self.buffering = True
-        success = eagerAll(self._placeSingleBlockGlobal(ivec3(*pos), block, replace) for pos in position)
+        if replace is None:
+            success = self._placeBlocksGlobalBuffered(position, block)
+        else:
+            success = eagerAll(self._placeSingleBlockGlobal(ivec3(*pos), block, replace) for pos in position)
         self.buffering = oldBuffering
         return success
 
 
+    def _placeBlocksGlobalBuffered(
+        self,
+        positions:      Iterable[Vec3iLike],
+        block:          Union[Block, Sequence[Block]]
+    ):
+        """Places <block> at all <positions> through the buffer, ignoring self.transform.\n
+        Equivalent to calling _placeSingleBlockGlobal() without a replace condition for each
+        position while buffering is enabled, but with the per-block overhead hoisted out of the
+        loop. <positions> may also be an (n,3) numpy array.\n
+        Returns whether the placement succeeded fully."""
+
+        if isinstance(positions, np.ndarray):
+            # Iterating over plain ints is much faster than iterating over array rows.
+            positions = positions.reshape(-1, 3).tolist()
+
+        palette = None if isinstance(block, Block) else block
+        if palette is None and not block.id:
+            return True
+
+        bufferLimit = self.bufferLimit
+        cache = self._cache if self.caching else None
+        worldSlice = self._worldSlice
+        worldSliceDecay = self._worldSliceDecay
+        worldSliceRect = worldSlice.rect if worldSlice is not None else None
+        worldSliceOffset = worldSlice.box.offset if worldSlice is not None else None
+        chunkCache = self._chunkCache
+        invalidatedChunks = set()
+
+        for pos in positions:
+            position = ivec3(*pos)
+
+            if palette is not None:
+                block = random.choice(palette)
+                if not block.id:
+                    continue
+
+            if len(self._buffer) >= bufferLimit:
+                self.flushBuffer()
+            # flushBuffer() may replace the buffer, so it is looked up each time.
+            buffer = self._buffer
+            buffer.pop(position, None) # Ensure the new block is added at the *end* of the buffer.
+            buffer[position] = block
+
+            if cache is not None:
+                cache[position] = block
+
+            if worldSliceRect is not None and worldSliceRect.contains(dropY(position)):
+                worldSliceDecay[tuple(position - worldSliceOffset)] = True
+
+            if chunkCache is not None:
+                chunkPosition = (position.x >> 4, position.z >> 4)
+                if chunkPosition not in invalidatedChunks:
+                    invalidatedChunks.add(chunkPosition)
+                    chunkCache.invalidate(chunkPosition, self.dimension, self.host)
+
+        return True
+
+
     def _placeSingleBlockGlobal(
         self,
         position:       ivec3,
@@ -460,6 +542,9 @@ class Editor:
         if self._worldSlice is not None and self._worldSlice.rect.contains(dropY(position)):
             self._worldSliceDecay[tuple(position - self._worldSlice.box.offset)] = True
 
+        if self._chunkCache is not None:
+            self._chunkCache.invalidate((position.x >> 4, position.z >> 4), self.dimension, self.host)
+
         return True
 
 
@@ -492,6 +577,14 @@ class Editor:
             # Flush block buffer
             if blockBuffer:
                 response = interface.placeBlocks(blockBuffer.items(), dimension=self.dimension, doBlockUpdates=self._bufferDoBlockUpdates, spawnDrops=self.spawnDrops, retries=self.retries, timeout=self.timeout, host=self.host)
+
+                # The chunks were already invalidated when the blocks were buffered, but they may
+                # have been cached again before the blocks were actually placed.
+                chunkCache = self._chunkCache
+                if chunkCache is not None:
+                    for chunkPosition in {(position.x >> 4, position.z >> 4) for position in blockBuffer}:
+                        chunkCache.invalidate(chunkPosition, self.dimension, self.host)
+
                 blockBuffer.clear()
 
                 for entry in response:
@@ -552,7 +645,7 @@ class Editor:
         cached world slice."""
         if rect is None:
             rect = self.getBuildArea().toRect()
-        worldSlice = WorldSlice(rect, dimension=self.dimension, heightmapTypes=heightmapTypes, retries=self.retries, timeout=self.timeout, host=self.host)
+        worldSlice = WorldSlice(rect, dimension=self.dimension, heightmapTypes=heightmapTypes, retries=self.retries, timeout=self.timeout, host=self.host, chunkCache=self._chunkCache)
         if cache:
             self._worldSlice      = worldSlice
             self._worldSliceDecay = np.zeros(self._worldSlice.box.size, dtype=bool)
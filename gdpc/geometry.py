@@ -3,7 +3,9 @@
 
 from typing import Optional, Sequence, Union, List, Iterable
 
-from .vector_tools import Vec2iLike, Vec3iLike, Rect, Box, cylinder, fittingCylinder, fittingEllipsoid, fittingSphere, line3D, lineSequence3D, ellipsoid
+import numpy as np
+
+from .vector_tools import Vec2iLike, Vec3iLike, Rect, Box, cylinderArray, fittingCylinderArray, fittingEllipsoid, fittingSphere, line3Darray, lineSequence3DArray, ellipsoid
 from .block import Block, transformedBlockOrPalette
 from .editor import Editor
 
@@ -14,7 +16,7 @@ def placeCuboid(editor: Editor, first: Vec3iLike, last: Vec3iLike, block: Union[
     first = editor.transform * first
     last = editor.transform * last
     block = transformedBlockOrPalette(block, editor.transform.rotation, editor.transform.flip)
-    editor.placeBlockGlobal(Box.between(first, last).inner, block, replace)
+    editor.placeBlockGlobal(Box.between(first, last).innerArray, block, replace)
 
 
 def placeCuboidHollow(editor: Editor, first: Vec3iLike, last: Vec3iLike, block: Union[Block, Sequence[Block]], replace: Optional[Union[str, List[str]]] = None):
@@ -23,7 +25,7 @@ def placeCuboidHollow(editor: Editor, first: Vec3iLike, last: Vec3iLike, block:
     first = editor.transform * first
     last = editor.transform * last
     block = transformedBlockOrPalette(block, editor.transform.rotation, editor.transform.flip)
-    editor.placeBlockGlobal(Box.between(first, last).shell, block, replace)
+    editor.placeBlockGlobal(Box.between(first, last).shellArray, block, replace)
 
 
 def placeCuboidWireframe(editor: Editor, first: Vec3iLike, last: Vec3iLike, block: Union[Block, Sequence[Block]], replace: Optional[Union[str, List[str]]] = None):
@@ -32,7 +34,7 @@ def placeCuboidWireframe(editor: Editor, first: Vec3iLike, last: Vec3iLike, bloc
     first = editor.transform * first
     last = editor.transform * last
     block = transformedBlockOrPalette(block, editor.transform.rotation, editor.transform.flip)
-    editor.placeBlockGlobal(Box.between(first, last).wireframe, block, replace)
+    editor.placeBlockGlobal(Box.between(first, last).wireframeArray, block, replace)
 
 
 def placeBox(editor: Editor, box: Box, block: Union[Block, Sequence[Block]], replace: Optional[Union[str, List[str]]] = None):
@@ -70,9 +72,11 @@ def placeCheckeredCuboid(editor: Editor, first: Vec3iLike, last: Vec3iLike, bloc
 
 def placeCheckeredBox(editor: Editor, box: Box, block1: Block, block2: Block = Block(None), replace: Optional[Union[str, List[str]]] = None):
     """Places a checker pattern of [block1] and [block2] in [box]"""
-    # We loop through [box]-local positions so that the pattern start is independent of [box].offset
-    for pos in Box(size=box.size).inner:
-        editor.placeBlock(box.offset + pos, block1 if sum(pos) % 2 == 0 else block2, replace)
+    # The pattern is based on [box]-local positions, so that its start is independent of [box].offset
+    points = box.innerArray
+    isFirst = (points - np.array(box.offset)).sum(axis=1) % 2 == 0
+    editor.placeBlock(points[isFirst],  block1, replace)
+    editor.placeBlock(points[~isFirst], block2, replace)
 
 
 def placeStripedCuboid(editor: Editor, first: Vec3iLike, last: Vec3iLike, block1: Block, block2: Block = Block(None), axis: int = 0, replace: Optional[Union[str, List[str]]] = None):
@@ -83,9 +87,11 @@ def placeStripedCuboid(editor: Editor, first: Vec3iLike, last: Vec3iLike, block1
 
 def placeStripedBox(editor: Editor, box: Box, block1: Union[Block, Sequence[Block]], block2: Union[Block, Sequence[Block]] = Block(None), axis: int = 0, replace: Optional[Union[str, List[str]]] = None):
     """Places a stripe pattern of [block1] and [block2] along [axis] (0, 1 or 2) in [box]"""
-    # We loop through [box]-local positions so that the pattern start is independent of [box].offset
-    for pos in Box(size=box.size).inner:
-        editor.placeBlock(box.offset + pos, block1 if pos[axis] % 2 == 0 else block2, replace)
+    # The pattern is based on [box]-local positions, so that its start is independent of [box].offset
+    points = box.innerArray
+    isFirst = (points[:, axis] - box.offset[axis]) % 2 == 0
+    editor.placeBlock(points[isFirst],  block1, replace)
+    editor.placeBlock(points[~isFirst], block2, replace)
 
 
 def placeLine(editor: Editor, first: Vec3iLike, last: Vec3iLike, block: Union[Block, Sequence[Block]], width=1, replace: Optional[Union[str, List[str]]] = None):
@@ -95,12 +101,12 @@ def placeLine(editor: Editor, first: Vec3iLike, last: Vec3iLike, block: Union[Bl
     first = editor.transform * first
     last = editor.transform * last
     block = transformedBlockOrPalette(block, editor.transform.rotation, editor.transform.flip)
-    editor.placeBlockGlobal(line3D(first, last, width), block, replace)
+    editor.placeBlockGlobal(line3Darray(first, last, width), block, replace)
 
 
 def placeLineSequence(editor: Editor, points: Iterable[Vec3iLike], block: Union[Block, Sequence[Block]], closed=False, replace: Optional[Union[str, List[str]]] = None):
     """Place lines that run from point to point."""
-    editor.placeBlock(lineSequence3D(points, closed=closed), block, replace)
+    editor.placeBlock(lineSequence3DArray(points, closed=closed), block, replace)
 
 
 def placeCylinder(
@@ -111,7 +117,7 @@ def placeCylinder(
     replace: Optional[Union[str, List[str]]] = None
 ):
     """Place blocks in the shape of a cylinder with the specified properties."""
-    editor.placeBlock(cylinder(baseCenter, diameters, length, axis, tube, hollow), block, replace)
+    editor.placeBlock(cylinderArray(baseCenter, diameters, length, axis, tube, hollow), block, replace)
 
 
 def placeFittingCylinder(
@@ -126,7 +132,7 @@ def placeFittingCylinder(
     corner1 = editor.transform * corner1
     corner2 = editor.transform * corner2
     block = transformedBlockOrPalette(block, editor.transform.rotation, editor.transform.flip)
-    editor.placeBlockGlobal(fittingCylinder(corner1, corner2, axis, tube, hollow), block, replace)
+    editor.placeBlockGlobal(fittingCylinderArray(corner1, corner2, axis, tube, hollow), block, replace)
 
 
 def placeSphere(
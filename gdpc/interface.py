@@ -5,14 +5,22 @@ It is recommended to use the higher-level `editor.Editor` class instead.
 
 
 from typing import Sequence, Tuple, Optional, List, Dict, Any, Union
-from functools import partial
+from functools import partial, lru_cache
 import time
 from urllib.parse import urlparse
 import logging
 import json
+import threading
+import io
 
 from glm import ivec3
 import requests
+try:
+    import orjson
+    _jsonLoads = orjson.loads
+except ImportError:
+    _jsonLoads = json.loads
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError as RequestConnectionError
 
 from . import __url__
@@ -28,6 +36,51 @@ DEFAULT_HOST = "http://localhost:9000"
 logger = logging.getLogger(__name__)
 
 
+# Requests are sent through one persistent session per host, so that connections are kept alive
+# and reused instead of being re-established for every call.
+_sessions: Dict[str, requests.Session] = {}
+_sessionsLock = threading.Lock()
+_sessionPoolConnections = 4
+_sessionPoolMaxSize     = 32
+
+_STREAM_BUFFER_SIZE = 64 * 1024
+
+
+def _getSession(host: str):
+    """Returns the session for <host>, creating it if it does not exist yet."""
+    with _sessionsLock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=_sessionPoolConnections, pool_maxsize=_sessionPoolMaxSize, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Connection"] = "keep-alive"
+            _sessions[host] = session
+        return session
+
+
+def closeSessions():
+    """Closes all persistent HTTP sessions and their pooled connections.\n
+    New sessions are created automatically when a request is made afterwards."""
+    with _sessionsLock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def setSessionPoolSize(poolConnections: int = 4, poolMaxSize: int = 32):
+    """Sets the connection pool sizes used for the persistent HTTP sessions.\n
+    <poolConnections> is the amount of connection pools to cache, and <poolMaxSize> is the maximum
+    amount of connections to keep in each pool. Raising <poolMaxSize> can help when sending many
+    requests from multiple threads at once.\n
+    Existing sessions are closed, so that the new sizes take effect for subsequent requests."""
+    global _sessionPoolConnections, _sessionPoolMaxSize # pylint: disable=global-statement
+    closeSessions()
+    _sessionPoolConnections = poolConnections
+    _sessionPoolMaxSize     = poolMaxSize
+
+
 def _onRequestRetry(e: Exception, retriesLeft: int):
     logger.warning(
         "HTTP request failed!\n"
@@ -40,10 +93,11 @@ def _onRequestRetry(e: Exception, retriesLeft: int):
 
 
 def _request(method: str, url: str, *args, retries: int, **kwargs):
+    u = urlparse(url)
+    session = _getSession(f"{u.scheme}://{u.netloc}")
     try:
-        response = withRetries(partial(requests.request, method, url, *args, **kwargs), RequestConnectionError, retries=retries, onRetry=_onRequestRetry)
+        response = withRetries(partial(session.request, method, url, *args, **kwargs), RequestConnectionError, retries=retries, onRetry=_onRequestRetry)
     except RequestConnectionError as e:
-        u = urlparse(url)
         raise exceptions.InterfaceConnectionError(
             f"Could not connect to the GDMC HTTP interface at {u.scheme}://{u.netloc}.\n"
              "To use GDPC, you need to use a \"backend\" that provides the GDMC HTTP interface.\n"
@@ -52,6 +106,8 @@ def _request(method: str, url: str, *args, retries: int, **kwargs):
         ) from e
 
     if response.status_code == 500:
+        # Release the connection, which is not done automatically for streamed responses.
+        response.close()
         raise exceptions.InterfaceInternalError("The GDMC HTTP interface reported an internal server error (500)")
 
     return response
@@ -81,8 +137,17 @@ def getBlocks(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension:
         'dimension': dimension
     }
     response = _request("GET", url, params=parameters, retries=retries, timeout=timeout)
-    blockDicts: List[Dict[str, Any]] = response.json()
-    return [(ivec3(b["x"], b["y"], b["z"]), Block(b["id"], b.get("state", {}), b.get("data") if b.get("data") != "{}" else None)) for b in blockDicts]
+    blockDicts: List[Dict[str, Any]] = _jsonLoads(response.content)
+    # The constructors are bound to locals, since this loop can run for millions of blocks.
+    ivec3_ = ivec3
+    Block_ = Block
+    result: List[Tuple[ivec3, Block]] = []
+    append = result.append
+    for b in blockDicts:
+        get = b.get
+        data = get("data")
+        append((ivec3_(b["x"], b["y"], b["z"]), Block_(b["id"], get("state", {}), data if data != "{}" else None)))
+    return result
 
 
 def getBiomes(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension: Optional[str] = None, retries=0, timeout=None, host=DEFAULT_HOST):
@@ -107,7 +172,7 @@ def getBiomes(position: Vec3iLike, size: Optional[Vec3iLike] = None, dimension:
         'dimension': dimension
     }
     response = _request("GET", url, params=parameters, retries=retries, timeout=timeout)
-    biomeDicts: List[Dict[str, Any]] = response.json()
+    biomeDicts: List[Dict[str, Any]] = _jsonLoads(response.content)
     return [(ivec3(b["x"], b["y"], b["z"]), str(b["id"])) for b in biomeDicts]
 
 
@@ -126,6 +191,51 @@ def placeBlocks(blocks: Sequence[Tuple[Vec3iLike, Block]], dimension: Optional[s
     successful, result will be 1 if the block changed, or 0 otherwise. If a block placement failed,
     result will be the error message.
     """
+    body = bytearray(b"[")
+    # Blocks are often placed many times in one call (e.g. when filling an area), so the serialized
+    # form of each distinct Block object is cached. The cache also holds a reference to the block,
+    # which guarantees that its id cannot be reused by another object during this call.
+    blockJsonCache: Dict[int, Tuple[Block, bytes]] = {}
+    for position, block in blocks:
+        cached = blockJsonCache.get(id(block))
+        if cached is None:
+            cached = blockJsonCache[id(block)] = (block, _blockJson(block))
+        body += b'{"x":%d,"y":%d,"z":%d,' % (position[0], position[1], position[2])
+        body += cached[1]
+        body += b","
+    if len(body) > 1:
+        body[-1:] = b"]"
+    else:
+        body += b"]"
+    return _placeBlocksBody(bytes(body), dimension, doBlockUpdates, spawnDrops, customFlags, retries, timeout, host)
+
+
+def _blockJson(block: Block):
+    """Returns the JSON object members describing <block> for a block placement request, followed
+    by the closing brace of the object."""
+    return _blockJsonFromFields(block.id, tuple(block.states.items()), block.data)
+
+
+@lru_cache(maxsize=4096)
+def _blockJsonFromFields(blockId: Optional[str], states: Tuple[Tuple[str, str], ...], data: Optional[str]):
+    """Cached implementation of _blockJson().\n
+    Blocks are mutable, so the cache is keyed by their fields instead of by the Block objects."""
+    return bytes(
+        f'"id":"{blockId}"' +
+        (f',"state":{json.dumps(dict(states), separators=(",",":"))}' if states else '') +
+        (f',"data":{repr(data)}' if data is not None else '') +
+        '}',
+        "utf-8"
+    )
+
+
+def _blockPlacementJson(position: Vec3iLike, block: Block):
+    """Returns the JSON object describing the placement of <block> at <position>."""
+    return b'{"x":%d,"y":%d,"z":%d,' % (position[0], position[1], position[2]) + _blockJson(block)
+
+
+def _placeBlocksBody(body: bytes, dimension: Optional[str], doBlockUpdates: bool, spawnDrops: bool, customFlags: str, retries: int, timeout, host: str):
+    """Sends an already serialized block placement request body. See placeBlocks()."""
     url = f"{host}/blocks"
 
     if customFlags != "":
@@ -136,25 +246,107 @@ def placeBlocks(blocks: Sequence[Tuple[Vec3iLike, Block]], dimension: Optional[s
     parameters = {"dimension": dimension}
     parameters.update(blockUpdateParams)
 
-    body = (
-        "[" +
-        ",".join(
-            '{' +
-            f'"x":{pos[0]},"y":{pos[1]},"z":{pos[2]},"id":"{block.id}"' +
-            (f',"state":{json.dumps(block.states, separators=(",",":"))}' if block.states else '') +
-            (f',"data":{repr(block.data)}' if block.data is not None else '') +
-            '}'
-            for pos, block in blocks
-        ) +
-        "]"
-    )
-
-    response = _request("PUT", url, data=bytes(body, "utf-8"), params=parameters, retries=retries, timeout=timeout)
+    response = _request("PUT", url, data=body, params=parameters, retries=retries, timeout=timeout)
 
-    result: List[Tuple[bool, Union[int, str]]] = [("message" not in entry, entry.get("message", int(entry["status"]))) for entry in response.json()]
+    # Only failed placements have a message; the status of those is not needed.
+    result: List[Tuple[bool, Union[int, str]]] = [
+        (True, int(entry["status"])) if "message" not in entry else (False, entry["message"])
+        for entry in _jsonLoads(response.content)
+    ]
     return result
 
 
+class BatchedPlacer:
+    """Coalesces block placements into batched placeBlocks() requests.
+
+    Placements are collected with .put(), and are sent as a single request once the pending batch
+    contains <maxBlocks> blocks or <maxBytes> bytes of request body. If <maxLatency> is not None,
+    the batch is also sent by .put() when its oldest placement has been pending for more than
+    <maxLatency> seconds.
+
+    Call .flush() to send any remaining placements. When used as a context manager, the batch is
+    flushed on exit.
+
+    The other parameters have the same meaning as for placeBlocks(). Failed placements of batches
+    that are sent automatically (including on context manager exit) are logged.
+
+    For most use cases, the buffering of the higher-level `editor.Editor` class is more convenient.
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[str] = None,
+        doBlockUpdates        = True,
+        spawnDrops            = False,
+        customFlags: str      = "",
+        maxBlocks             = 50_000,
+        maxBytes              = 1_000_000,
+        maxLatency: Optional[float] = None,
+        retries               = 0,
+        timeout               = None,
+        host                  = DEFAULT_HOST,
+    ):
+        self.dimension      = dimension
+        self.doBlockUpdates = doBlockUpdates
+        self.spawnDrops     = spawnDrops
+        self.customFlags    = customFlags
+        self.maxBlocks      = maxBlocks
+        self.maxBytes       = maxBytes
+        self.maxLatency     = maxLatency
+        self.retries        = retries
+        self.timeout        = timeout
+        self.host           = host
+
+        self._buffer = bytearray(b"[")
+        self._blockCount = 0
+        self._batchStartTime = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self._flushAndLog()
+
+    def __len__(self):
+        """Returns the amount of pending placements."""
+        return self._blockCount
+
+    def put(self, position: Vec3iLike, block: Block):
+        """Adds the placement of <block> at <position> to the pending batch.\n
+        Sends the batch if one of the limits is reached."""
+        if self._blockCount == 0:
+            self._batchStartTime = time.monotonic()
+        else:
+            self._buffer += b","
+        self._buffer += _blockPlacementJson(position, block)
+        self._blockCount += 1
+
+        if (
+            self._blockCount >= self.maxBlocks or
+            len(self._buffer) >= self.maxBytes or
+            (self.maxLatency is not None and time.monotonic() - self._batchStartTime > self.maxLatency)
+        ):
+            self._flushAndLog()
+
+    def flush(self):
+        """Sends all pending placements.\n
+        Returns a list of (success, result)-tuples, one for each block, as described in
+        placeBlocks()."""
+        if self._blockCount == 0:
+            return []
+        body = bytes(self._buffer + b"]")
+        result = _placeBlocksBody(body, self.dimension, self.doBlockUpdates, self.spawnDrops, self.customFlags, self.retries, self.timeout, self.host)
+        # The batch is only cleared once it was sent, so that a failed flush can be retried.
+        self._buffer = bytearray(b"[")
+        self._blockCount = 0
+        return result
+
+    def _flushAndLog(self):
+        for success, result in self.flush():
+            if not success:
+                logger.error("Server returned error upon placing batched block:\n  %s", result)
+
+
 def runCommand(command: str, dimension: Optional[str] = None, retries=0, timeout=None, host=DEFAULT_HOST):
     """Executes one or multiple Minecraft commands (separated by newlines).
 
@@ -167,7 +359,7 @@ def runCommand(command: str, dimension: Optional[str] = None, retries=0, timeout
     """
     url = f"{host}/command"
     response = _request("POST", url, data=bytes(command, "utf-8"), params={'dimension': dimension}, retries=retries, timeout=timeout)
-    result: List[Tuple[bool, Optional[str]]] = [(bool(entry["status"]), entry.get("message")) for entry in response.json()]
+    result: List[Tuple[bool, Optional[str]]] = [(bool(entry["status"]), entry.get("message")) for entry in _jsonLoads(response.content)]
     return result
 
 
@@ -230,6 +422,43 @@ def getChunks(position: Vec2iLike, size: Optional[Vec2iLike] = None, dimension:
     return response.content if asBytes else response.text
 
 
+def getChunksStream(position: Vec2iLike, size: Optional[Vec2iLike] = None, dimension: Optional[str] = None, retries=0, timeout=None, host=DEFAULT_HOST):
+    """Returns raw binary chunk data as a readable binary stream.
+
+    Like getChunks() with asBytes=True, but the data is read from the HTTP response as the stream is
+    read, instead of being loaded into memory all at once. The stream should be read to its end or
+    closed to release the connection.
+
+    <position> specifies the position in chunk coordinates, and <size> specifies how many chunks
+    to get in each axis (default 1).
+    <dimension> can be one of {"overworld", "the_nether", "the_end"} (default "overworld").
+
+    Raises an InterfaceError if the interface responds with an error instead of chunk data.
+    """
+    url = f"{host}/chunks"
+    x, z = position
+    dx, dz = (None, None) if size is None else size
+    parameters = {
+        "x": x,
+        "z": z,
+        "dx": dx,
+        "dz": dz,
+        "dimension": dimension,
+    }
+    # The data is requested uncompressed, so that it can be read without decompressing it first.
+    headers = {"Accept": "application/octet-stream", "Accept-Encoding": "identity"}
+    response = _request("GET", url, params=parameters, headers=headers, stream=True, retries=retries, timeout=timeout)
+    if response.status_code != 200:
+        # The body is an error message, not chunk data.
+        message = response.text
+        response.close()
+        raise exceptions.InterfaceError(f"The GDMC HTTP interface returned status {response.status_code} when getting chunks:\n  {message}")
+    # In case the server compresses the data anyway.
+    response.raw.decode_content = True
+    # Parsers tend to do many small reads, which are slow on the raw response.
+    return io.BufferedReader(response.raw, buffer_size=_STREAM_BUFFER_SIZE)
+
+
 def getVersion(retries=0, timeout=None, host=DEFAULT_HOST):
     """Returns the Minecraft version as a string."""
     return _request("GET", f"{host}/version", retries=retries, timeout=timeout).text
@@ -49,6 +49,19 @@ def lecternData(bookData: Optional[str], page: int = 0):
     return f'{{Book: {{id: "minecraft:written_book", Count: 1b, tag: {bookData}, Page: {page}}}}}'
 
 
+_charToWidth = lookup.ASCII_CHAR_TO_WIDTH.get
+
+
+@lru_cache(maxsize=4096)
+def _fontWidth(word: str):
+    """Return the length of a word based on character width.
+
+    If a letter is not found, a width of 9 is assumed
+    A character spacing of 1 is automatically integrated
+    """
+    return sum(_charToWidth(letter, 9) + 1 for letter in word) - 1
+
+
 def bookData(
     text: str,
     title       = "Chronicle",
@@ -93,21 +106,17 @@ def bookData(
     NOTE: For supported special characters see
     https://minecraft.fandom.com/wiki/Language#Font
     """
+    # The limits are used in the innermost loops, so they are looked up only once.
+    characters_per_page = lookup.BOOK_CHARACTERS_PER_PAGE
+    lines_per_page      = lookup.BOOK_LINES_PER_PAGE
+    pixels_per_line     = lookup.BOOK_PIXELS_PER_LINE
+
     pages_left      = lookup.BOOK_PAGES_PER_BOOK
-    characters_left = lookup.BOOK_CHARACTERS_PER_PAGE
-    lines_left      = lookup.BOOK_LINES_PER_PAGE
-    pixels_left     = lookup.BOOK_PIXELS_PER_LINE
+    characters_left = characters_per_page
+    lines_left      = lines_per_page
+    pixels_left     = pixels_per_line
     toprint = ''
 
-    @lru_cache()
-    def fontwidth(word):
-        """Return the length of a word based on character width.
-
-        If a letter is not found, a width of 9 is assumed
-        A character spacing of 1 is automatically integrated
-        """
-        return sum(lookup.ASCII_CHAR_TO_WIDTH.get(letter, 9) + 1 for letter in word) - 1
-
     def printline():
         nonlocal outputPages, toprint
         formatting = toprint[:2]
@@ -128,15 +137,15 @@ def bookData(
             return
         characters_left -= 2
         lines_left -= 1
-        pixels_left = lookup.BOOK_PIXELS_PER_LINE
+        pixels_left = pixels_per_line
         outputPages[-1] += "\n"
 
     def newpage():
         nonlocal characters_left, lines_left, pixels_left, outputPages
         printline()
-        characters_left = lookup.BOOK_CHARACTERS_PER_PAGE
-        lines_left      = lookup.BOOK_LINES_PER_PAGE
-        pixels_left     = lookup.BOOK_PIXELS_PER_LINE
+        characters_left = characters_per_page
+        lines_left      = lines_per_page
+        pixels_left     = pixels_per_line
         outputPages.append("") # end page and start new page
 
     pages = list(text.split('\f'))
@@ -155,12 +164,12 @@ def bookData(
         for line in page:
             toprint = ""
             for word in line:
-                width = fontwidth(word + ' ')
+                width = _fontWidth(word + ' ')
                 if width > pixels_left:
-                    if width > lookup.BOOK_PIXELS_PER_LINE:  # cut word to fit
+                    if width > pixels_per_line:  # cut word to fit
                         original = word
                         for letter in original:
-                            charwidth = fontwidth(letter) + 1
+                            charwidth = _fontWidth(letter) + 1
                             if charwidth > pixels_left:
                                 newline()
                             toprint += letter
@@ -1,6 +1,11 @@
 """Utilities for working with Minecraft's NBT and SNBT formats"""
 
 
+from typing import BinaryIO, Callable, List, Optional, Tuple
+import struct
+from struct import Struct
+import threading
+
 from nbt import nbt
 
 
@@ -31,3 +36,258 @@ def nbtToSnbt(tag: nbt.TAG) -> str:
     if isinstance(tag, nbt.TAG_String):
         return repr(tag.value)
     raise TypeError(f"Unrecognized tag type: {type(tag)}")
+
+
+_BYTE   = Struct(">b")
+_SHORT  = Struct(">h")
+_USHORT = Struct(">H")
+_INT    = Struct(">i")
+_LONG   = Struct(">q")
+_FLOAT  = Struct(">f")
+_DOUBLE = Struct(">d")
+
+_NUMERIC_TAGS = {
+    nbt.TAG_BYTE:   (nbt.TAG_Byte,   _BYTE),
+    nbt.TAG_SHORT:  (nbt.TAG_Short,  _SHORT),
+    nbt.TAG_INT:    (nbt.TAG_Int,    _INT),
+    nbt.TAG_LONG:   (nbt.TAG_Long,   _LONG),
+    nbt.TAG_FLOAT:  (nbt.TAG_Float,  _FLOAT),
+    nbt.TAG_DOUBLE: (nbt.TAG_Double, _DOUBLE),
+}
+
+
+def _parseString(data: bytes, offset: int) -> Tuple[str, int]:
+    """Parses an NBT string payload at <offset>. Returns the string and the next offset."""
+    length = _USHORT.unpack_from(data, offset)[0]
+    offset += 2
+    return data[offset:offset + length].decode("utf-8"), offset + length
+
+
+def _parseCompoundPayload(name: str, data: bytes, offset: int) -> Tuple[nbt.TAG_Compound, int]:
+    """Parses the payload of a compound tag at <offset>. Returns the tag and the next offset.\n
+    Tags are created without calling their constructors, which would otherwise dominate the
+    parsing time. The resulting tags have the same attributes as those created by the nbt package.
+    The most common child tags (numbers and strings) are parsed inline for the same reason."""
+    # pylint: disable=no-value-for-parameter
+    tag = nbt.TAG_Compound.__new__(nbt.TAG_Compound)
+    tag.name = name
+    tag.value = None
+    tags: List[nbt.TAG] = []
+    append = tags.append
+    unpackUShort = _USHORT.unpack_from
+    numericTags = _NUMERIC_TAGS
+    while True:
+        childType = data[offset]
+        if childType == nbt.TAG_END:
+            offset += 1
+            break
+        nameLength = unpackUShort(data, offset + 1)[0]
+        offset += 3
+        childName = data[offset:offset + nameLength].decode("utf-8")
+        offset += nameLength
+        numeric = numericTags.get(childType)
+        if numeric is not None:
+            cls, fmt = numeric
+            child = cls.__new__(cls)
+            child.name = childName
+            child.value = fmt.unpack_from(data, offset)[0]
+            offset += fmt.size
+        elif childType == nbt.TAG_STRING:
+            child = nbt.TAG_String.__new__(nbt.TAG_String)
+            child.name = childName
+            child.value, offset = _parseString(data, offset)
+        else:
+            child, offset = _parsePayload(childType, childName, data, offset)
+        append(child)
+    tag.tags = tags
+    return tag, offset
+
+
+def _parsePayload(tagType: int, name: Optional[str], data: bytes, offset: int) -> Tuple[nbt.TAG, int]:
+    """Parses the payload of a tag of type <tagType> at <offset>. Returns the tag and the next offset."""
+    # pylint: disable=no-value-for-parameter
+    if tagType == nbt.TAG_COMPOUND:
+        return _parseCompoundPayload(name if name else "", data, offset)
+
+    numeric = _NUMERIC_TAGS.get(tagType)
+    if numeric is not None:
+        cls, fmt = numeric
+        tag = cls.__new__(cls)
+        tag.name = name
+        tag.value = fmt.unpack_from(data, offset)[0]
+        return tag, offset + fmt.size
+
+    if tagType == nbt.TAG_LIST:
+        tag = nbt.TAG_List.__new__(nbt.TAG_List)
+        tag.name = name
+        tag.value = None
+        elementType = data[offset]
+        length = _INT.unpack_from(data, offset + 1)[0]
+        offset += 5
+        tags: List[nbt.TAG] = []
+        append = tags.append
+        if elementType == nbt.TAG_COMPOUND:
+            for _ in range(length):
+                element, offset = _parseCompoundPayload("", data, offset)
+                append(element)
+        else:
+            for _ in range(length):
+                element, offset = _parsePayload(elementType, None, data, offset)
+                append(element)
+        tag.tagID = elementType
+        tag.tags = tags
+        return tag, offset
+
+    if tagType == nbt.TAG_STRING:
+        tag = nbt.TAG_String.__new__(nbt.TAG_String)
+        tag.name = name
+        tag.value, offset = _parseString(data, offset)
+        return tag, offset
+
+    if tagType in (nbt.TAG_LONG_ARRAY, nbt.TAG_INT_ARRAY, nbt.TAG_BYTE_ARRAY):
+        length = _INT.unpack_from(data, offset)[0]
+        offset += 4
+        if tagType == nbt.TAG_LONG_ARRAY:
+            tag = nbt.TAG_Long_Array(name=name)
+            tag.value = list(struct.unpack_from(f">{length}q", data, offset))
+            return tag, offset + 8 * length
+        if tagType == nbt.TAG_INT_ARRAY:
+            tag = nbt.TAG_Int_Array(name=name)
+            tag.value = list(struct.unpack_from(f">{length}i", data, offset))
+            return tag, offset + 4 * length
+        tag = nbt.TAG_Byte_Array(name=name)
+        tag.value = bytearray(data[offset:offset + length])
+        return tag, offset + length
+
+    raise ValueError(f"Unrecognised tag type {tagType}")
+
+
+def parseNbt(data: bytes) -> nbt.NBTFile:
+    """Parses uncompressed binary NBT <data> into an nbt.NBTFile.\n
+    The result is equivalent to nbt.NBTFile(buffer=BytesIO(<data>)), but this function is
+    several times faster for large inputs, such as the chunk data returned by
+    `interface.getChunks()`."""
+    try:
+        if data[0] != nbt.TAG_COMPOUND:
+            raise nbt.MalformedFileError("First record is not a Compound Tag")
+        name, offset = _parseString(data, 1)
+        root, _ = _parseCompoundPayload(name, data, offset)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise nbt.MalformedFileError("Partial File Parse: file possibly truncated.") from e
+    nbtFile = nbt.NBTFile()
+    nbtFile.name = root.name
+    nbtFile.tags = root.tags
+    return nbtFile
+
+
+class _StreamBuffer:
+    """Reads a binary stream into a growing buffer on a background thread."""
+
+    def __init__(self, stream: BinaryIO, readSize: int):
+        self.data = bytearray()
+        self.done = False
+        self._error: Optional[BaseException] = None
+        self._condition = threading.Condition()
+        thread = threading.Thread(target=self._read, args=(stream, readSize), name="gdpc-nbt-stream", daemon=True)
+        thread.start()
+
+    def _read(self, stream: BinaryIO, readSize: int):
+        try:
+            while True:
+                # Some streams, such as HTTP responses, close themselves once they are exhausted.
+                if stream.closed:
+                    break
+                block = stream.read(readSize)
+                if not block:
+                    break
+                with self._condition:
+                    self.data += block
+                    self._condition.notify_all()
+        except BaseException as e: # pylint: disable=broad-except
+            self._error = e
+        finally:
+            with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    def waitFor(self, size: int):
+        """Blocks until at least <size> bytes have been read, or until the stream has ended.\n
+        Re-raises any exception that occurred while reading."""
+        with self._condition:
+            while len(self.data) < size and not self.done:
+                self._condition.wait()
+            if self._error is not None:
+                raise self._error
+
+    def parse(self, parseFunction: Callable[[int], Tuple[nbt.TAG, int]], offset: int, sizeEstimate: int):
+        """Calls <parseFunction>(<offset>) as soon as it succeeds on the data read so far.\n
+        The first attempt is made once <sizeEstimate> bytes are available after <offset>, and a new
+        attempt is made whenever more data arrives. Returns the result of <parseFunction>."""
+        size = offset + sizeEstimate
+        while True:
+            self.waitFor(size)
+            try:
+                tag, nextOffset = parseFunction(offset)
+                # Slices of truncated data do not raise, so string and byte array payloads can
+                # end beyond the data read so far.
+                if nextOffset <= len(self.data):
+                    return tag, nextOffset
+            except (IndexError, struct.error, UnicodeDecodeError):
+                if self.done:
+                    raise
+            if self.done:
+                raise IndexError("NBT data ends unexpectedly")
+            size = len(self.data) + 1
+
+
+def parseNbtStream(stream: BinaryIO, readSize = 1 << 20) -> nbt.NBTFile:
+    """Parses uncompressed binary NBT data from the binary <stream> into an nbt.NBTFile.\n
+    The stream is read on a background thread in blocks of <readSize> bytes, and the data is parsed
+    while it is being received. Lists at the top level of the data (such as the "Chunks" list in the
+    chunk data returned by the GDMC HTTP interface) are parsed element by element, so for large
+    inputs, receiving and parsing the data largely overlap.\n
+    The result is the same as that of parseNbt()."""
+    buffer = _StreamBuffer(stream, readSize)
+    data = buffer.data
+    try:
+        buffer.waitFor(1)
+        if data[0] != nbt.TAG_COMPOUND:
+            raise nbt.MalformedFileError("First record is not a Compound Tag")
+        rootName, offset = buffer.parse(lambda o: _parseString(data, o), 1, 2)
+        tags: List[nbt.TAG] = []
+        while True:
+            buffer.waitFor(offset + 1)
+            childType = data[offset]
+            if childType == nbt.TAG_END:
+                break
+            childName, offset = buffer.parse(lambda o: _parseString(data, o), offset + 1, 2)
+
+            if childType != nbt.TAG_LIST:
+                child, offset = buffer.parse(lambda o, t=childType, n=childName: _parsePayload(t, n, data, o), offset, 1)
+                tags.append(child)
+                continue
+
+            buffer.waitFor(offset + 5)
+            child = nbt.TAG_List.__new__(nbt.TAG_List) # pylint: disable=no-value-for-parameter
+            child.name = childName
+            child.value = None
+            child.tagID = data[offset]
+            length = _INT.unpack_from(data, offset + 1)[0]
+            offset += 5
+            elements: List[nbt.TAG] = []
+            # The elements of a list tend to have similar sizes, so the size of the previous
+            # element is used to avoid attempting to parse an element before it has been received.
+            elementSize = 1
+            for _ in range(length):
+                element, nextOffset = buffer.parse(lambda o, t=child.tagID: _parsePayload(t, None, data, o), offset, elementSize)
+                elements.append(element)
+                elementSize = nextOffset - offset
+                offset = nextOffset
+            child.tags = elements
+            tags.append(child)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise nbt.MalformedFileError("Partial File Parse: file possibly truncated.") from e
+    nbtFile = nbt.NBTFile()
+    nbtFile.name = rootName
+    nbtFile.tags = tags
+    return nbtFile
@@ -5,6 +5,7 @@ from typing import Union
 from dataclasses import dataclass
 
 from glm import ivec3, bvec3
+import numpy as np
 
 from .vector_tools import Vec3iLike, Vec3bLike, rotate3D, flipRotation3D, flipToScale3D, rotateSize3D, Box
 
@@ -73,6 +74,17 @@ class Transform:
         Equivalent to [self] * [vec]. """
         return rotate3D(vec * flipToScale3D(self._flip), self._rotation) + self._translation
 
+    def applyArray(self, points: np.ndarray) -> np.ndarray:
+        """Applies this transform to all points in the (n,3) array [points], and returns the
+        results as an (n,3) array."""
+        # Rows are the images of the unit vectors, so a row vector can be transformed with a single
+        # matrix product.
+        matrix = np.array([
+            tuple(self.apply(unit) - self._translation)
+            for unit in (ivec3(1,0,0), ivec3(0,1,0), ivec3(0,0,1))
+        ], dtype=np.int64)
+        return np.asarray(points, dtype=np.int64).reshape(-1, 3) @ matrix + np.array(self._translation, dtype=np.int64)
+
     def invApply(self, vec: Vec3iLike):
         """Applies the inverse of this transform to [vec].\n
         Faster version of ~[self] * [vec]."""
@@ -1,10 +1,11 @@
 """Various vector utilities"""
 
 
-from typing import Sequence, Any, Iterable, List, Optional, Set, Tuple, Union
+from typing import Sequence, Any, Iterable, List, Optional, Tuple, Union
 from abc import ABC
 from numbers import Integral
 from dataclasses import dataclass
+from functools import lru_cache
 import math
 
 from more_itertools import powerset
@@ -114,6 +115,13 @@ DIAGONALS_3D = (
 # ==================================================================================================
 
 
+def _pointArray(points: Iterable[Sequence[int]], dimensions: int) -> np.ndarray:
+    """Returns <points> as an (n,<dimensions>) int64 numpy array, converting it only if necessary."""
+    if isinstance(points, np.ndarray):
+        return points.astype(np.int64, copy=False).reshape(-1, dimensions)
+    return np.array([tuple(point) for point in points], dtype=np.int64).reshape(-1, dimensions)
+
+
 def dropDimension(vec: Vec3iLike, dimension: int):
     """Returns <vec> without its <dimension>-th component"""
     if dimension == 0: return ivec2(vec[1], vec[2])
@@ -302,14 +310,13 @@ def orderedCorners3D(corner1: Vec3iLike, corner2: Vec3iLike):
     )
 
 
-def getDimensionality(corner1: Union[Vec2iLike, Vec3iLike], corner2: Union[Vec2iLike, Vec3iLike]) -> Tuple[int, List[str]]:
+def getDimensionality(corner1: Union[Vec2iLike, Vec3iLike], corner2: Union[Vec2iLike, Vec3iLike]) -> Tuple[int, List[int]]:
     """Determines the number of dimensions for which <corner1> and <corner2> are in general
     position, i.e. the number of dimensions for which the volume they define is not flat.\n
     Returns (dimensionality, list of indices of dimensions for which the volume is flat).
     For example: (2, [0,2]) means that the volume is flat in the x and z axes."""
-    difference = np.array(corner1) - np.array(corner2)
-    flatSides = np.argwhere(difference == 0).flatten()
-    return len(corner1) - np.sum(flatSides), list(flatSides)
+    flatSides = [i for i in range(len(corner1)) if corner1[i] == corner2[i]]
+    return len(corner1) - len(flatSides), flatSides
 
 
 # ==================================================================================================
@@ -477,7 +484,7 @@ class Rect:
     @staticmethod
     def bounding(points: Iterable[Vec2iLike]):
         """Returns the smallest Rect containing all [points]"""
-        pointArray = np.array(points)
+        pointArray = _pointArray(points, 2)
         minPoint = np.min(pointArray, axis=0)
         maxPoint = np.max(pointArray, axis=0)
         return Rect(minPoint, maxPoint - minPoint + 1)
@@ -577,6 +584,13 @@ class Box:
             for z in range(self.begin.z, self.end.z)
         )
 
+    @property
+    def innerArray(self) -> np.ndarray:
+        """Returns an (n,3) numpy array containing all points in this Box, in the same order as
+        .inner"""
+        xs, ys, zs = np.mgrid[self.begin.x:self.end.x, self.begin.y:self.end.y, self.begin.z:self.end.z]
+        return np.stack([xs.ravel(), ys.ravel(), zs.ravel()], axis=1).astype(np.int64, copy=False)
+
     @property
     def volume(self):
         """This Box's volume"""
@@ -660,7 +674,7 @@ class Box:
     @staticmethod
     def bounding(points: Iterable[Vec3iLike]):
         """Returns the smallest Box containing all [points]"""
-        pointArray = np.array(points)
+        pointArray = _pointArray(points, 3)
         minPoint = np.min(pointArray, axis=0)
         maxPoint = np.max(pointArray, axis=0)
         return Box(minPoint, maxPoint - minPoint + 1)
@@ -669,47 +683,41 @@ class Box:
         """Returns this Box's XZ-plane as a Rect"""
         return Rect(dropY(self._offset), dropY(self._size))
 
+    def _boundaryMasks(self):
+        """Returns three boolean arrays that indicate, for each x, y and z coordinate in this Box,
+        whether it lies on the Box's boundary along that axis."""
+        masks = []
+        for size in self._size:
+            mask = np.zeros(max(size, 0), dtype=bool)
+            if size > 0:
+                mask[0] = mask[-1] = True
+            masks.append(mask)
+        return masks
+
+    @property
+    def shellArray(self) -> np.ndarray:
+        """Returns an (n,3) numpy array containing all points on this Box's surface"""
+        onX, onY, onZ = self._boundaryMasks()
+        mask = onX[:, None, None] | onY[None, :, None] | onZ[None, None, :]
+        return np.argwhere(mask) + np.array(self._offset)
+
     @property
     def shell(self):
         """Yields all points on this Box's surface"""
-        # It's surprisingly difficult to get this right without duplicates. (Think of the corners!)
-        first = self.begin
-        last  = self.end - 1
-        # Bottom face
-        yield from loop3D(ivec3(first.x, first.y, first.z), ivec3(last.x, first.y, last.z) + 1)
-        # Top face
-        yield from loop3D(ivec3(first.x, last.y, first.z), ivec3(last.x, last.y, last.z) + 1)
-        # Sides
-        if self._size.y < 3:
-            return
-        yield from loop3D(ivec3(first.x, first.y+1, first.z), ivec3(last.x -1,  last.y-1, first.z   ) + 1)
-        yield from loop3D(ivec3(last.x,  first.y+1, first.z), ivec3(last.x,     last.y-1, last.z  -1) + 1)
-        yield from loop3D(ivec3(last.x,  first.y+1, last.z ), ivec3(first.x +1, last.y+1, last.z    ) - 1)
-        yield from loop3D(ivec3(first.x, first.y+1, last.z ), ivec3(first.x,    last.y+1, first.z +1) - 1)
+        return (ivec3(*point) for point in self.shellArray.tolist())
+
+    @property
+    def wireframeArray(self) -> np.ndarray:
+        """Returns an (n,3) numpy array containing all points on this Box's edges"""
+        # A point is on an edge if it lies on the boundary along at least two axes.
+        onX, onY, onZ = (mask.astype(np.int8) for mask in self._boundaryMasks())
+        mask = onX[:, None, None] + onY[None, :, None] + onZ[None, None, :] >= 2
+        return np.argwhere(mask) + np.array(self._offset)
 
     @property
     def wireframe(self):
         """Yields all points on this Box's edges"""
-        # It's surprisingly difficult to get this right without duplicates. (Think of the corners!)
-        first = self.begin
-        last  = self.end - 1
-        # Bottom face
-        yield from loop3D(ivec3(first.x, first.y, first.z), ivec3(last.x -1,  first.y, first.z   ) + 1)
-        yield from loop3D(ivec3(last.x,  first.y, first.z), ivec3(last.x,     first.y, last.z  -1) + 1)
-        yield from loop3D(ivec3(last.x,  first.y, last.z ), ivec3(first.x +1, first.y, last.z    ) - 1)
-        yield from loop3D(ivec3(first.x, first.y, last.z ), ivec3(first.x,    first.y, first.z +1) - 1)
-        # top face
-        yield from loop3D(ivec3(first.x, last.y,  first.z), ivec3(last.x -1,  last.y,  first.z   ) + 1)
-        yield from loop3D(ivec3(last.x,  last.y,  first.z), ivec3(last.x,     last.y,  last.z  -1) + 1)
-        yield from loop3D(ivec3(last.x,  last.y,  last.z ), ivec3(first.x +1, last.y,  last.z    ) - 1)
-        yield from loop3D(ivec3(first.x, last.y,  last.z ), ivec3(first.x,    last.y,  first.z +1) - 1)
-        # sides
-        if self._size.y < 3:
-            return
-        yield from loop3D(ivec3(first.x, first.y+1, first.z), ivec3(first.x, last.y-1, first.z) + 1)
-        yield from loop3D(ivec3(last.x,  first.y+1, first.z), ivec3(last.x,  last.y-1, first.z) + 1)
-        yield from loop3D(ivec3(last.x,  first.y+1, last.z ), ivec3(last.x,  last.y-1, last.z ) + 1)
-        yield from loop3D(ivec3(first.x, first.y+1, last.z ), ivec3(first.x, last.y-1, last.z ) + 1)
+        return (ivec3(*point) for point in self.wireframeArray.tolist())
 
 
 def rectSlice(array: np.ndarray, rect: Rect):
@@ -770,70 +778,89 @@ def cuboid3D(corner1: Vec3iLike, corner2: Vec3iLike):
     return Box.between(corner1, corner2).inner
 
 
+def cuboid3DArray(corner1: Vec3iLike, corner2: Vec3iLike) -> np.ndarray:
+    """Returns an (n,3) numpy array containing all points in the box between <corner1> and
+    <corner2> (inclusive)."""
+    return Box.between(corner1, corner2).innerArray
+
+
 def filled2DArray(points: Iterable[Vec2iLike], seedPoint: Vec2iLike, boundingRect: Optional[Rect] = None, includeInputPoints=True) -> np.ndarray:
     """Fills the shape defined by <points>, starting at <seedPoint> and returns a (n,2) numpy array
     containing the resulting points.\n
     <boundingRect> should contain all <points>. If not provided, it is calculated."""
+    # <points> may be any iterable (even a generator), so it is converted only once.
+    pointArray = _pointArray(points, 2)
     if boundingRect is None:
-        boundingRect = Rect.bounding(points)
+        boundingRect = Rect.bounding(pointArray)
 
-    pointMap = np.zeros(boundingRect.size, dtype=int)
-    pointMap[tuple(np.transpose(np.array(points) - np.array(boundingRect.offset)))] = 1
+    # The maps only hold zeros and ones, so a single byte per cell is sufficient.
+    pointMap = np.zeros(boundingRect.size, dtype=np.uint8)
+    pointMap[tuple(np.transpose(pointArray - np.array(boundingRect.offset)))] = 1
     filled = skimage.segmentation.flood_fill(pointMap, tuple(ivec2(*seedPoint) - boundingRect.offset), 1, footprint=np.array([[0,1,0],[1,1,1],[0,1,0]]))
     if not includeInputPoints:
-        filled -= pointMap
+        filled[pointMap.view(bool)] = 0
     return np.argwhere(filled) + np.array(boundingRect.offset)
 
 
 def filled2D(points: Iterable[Vec2iLike], seedPoint: Vec2iLike, boundingRect: Optional[Rect] = None, includeInputPoints=True):
     """Fills the shape defined by <points>, starting at <seedPoint> and yields the resulting points.\n
     <boundingRect> should contain all <points>. If not provided, it is calculated."""
-    return (ivec2(*point) for point in filled2DArray(points, seedPoint, boundingRect, includeInputPoints))
+    return (ivec2(*point) for point in filled2DArray(points, seedPoint, boundingRect, includeInputPoints).tolist())
 
 
 def filled3DArray(points: Iterable[Vec3iLike], seedPoint: Vec3iLike, boundingBox: Optional[Box] = None, includeInputPoints=True) -> np.ndarray:
     """Fills the shape defined by <points>, starting at <seedPoint> and returns a (n,3) numpy array
     containing the resulting points.\n
     <boundingBox> should contain all <points>. If not provided, it is calculated."""
+    # <points> may be any iterable (even a generator), so it is converted only once.
+    pointArray = _pointArray(points, 3)
     if boundingBox is None:
-        boundingBox = Rect.bounding(points)
+        boundingBox = Box.bounding(pointArray)
 
-    pointMap = np.zeros(boundingBox.size, dtype=int)
-    pointMap[tuple(np.transpose(np.array(points) - np.array(boundingBox.offset)))] = 1
+    # The maps only hold zeros and ones, so a single byte per cell is sufficient.
+    pointMap = np.zeros(boundingBox.size, dtype=np.uint8)
+    pointMap[tuple(np.transpose(pointArray - np.array(boundingBox.offset)))] = 1
     filled = skimage.segmentation.flood_fill(pointMap, tuple(ivec3(*seedPoint) - boundingBox.offset), 1, connectivity=1)
     if not includeInputPoints:
-        filled -= pointMap
+        filled[pointMap.view(bool)] = 0
     return np.argwhere(filled) + np.array(boundingBox.offset)
 
 
 def filled3D(points: Iterable[Vec3iLike], seedPoint: Vec3iLike, boundingBox: Optional[Box] = None, includeInputPoints=True):
     """Fills the shape defined by <points>, starting at <seedPoint> and yields the resulting points.\n
     <boundingBox> should contain all <points>. If not provided, it is calculated."""
-    return (ivec3(*point) for point in filled3DArray(points, seedPoint, boundingBox, includeInputPoints))
+    return (ivec3(*point) for point in filled3DArray(points, seedPoint, boundingBox, includeInputPoints).tolist())
 
 
 # TODO: separate out thickening code?
 def _lineArray(begin: Union[Vec2iLike, Vec3iLike], end: Union[Vec2iLike, Vec3iLike], width: int = 1) -> np.ndarray:
-    begin: np.ndarray = np.array(begin)
-    end:   np.ndarray = np.array(end)
+    """Returns an (n,d) int64 array of the points on the line between <begin> and <end>
+    (inclusive), thickened to <width>."""
+    begin: np.ndarray = np.array(begin, dtype=np.int64)
+    end:   np.ndarray = np.array(end,   dtype=np.int64)
     delta = end - begin
-    maxDelta = int(max(abs(delta)))
+    maxDelta = int(np.max(np.abs(delta)))
     if maxDelta == 0:
-        return np.array([])
-    points = delta[np.newaxis,:] * np.arange(maxDelta + 1)[:,np.newaxis] / maxDelta + np.array(begin)
-    points = np.rint(points).astype(np.signedinteger)
+        points = begin[np.newaxis,:]
+    elif np.count_nonzero(delta) == 1:
+        # Axis-aligned lines need no rounding: only a single coordinate varies.
+        axis = int(np.flatnonzero(delta)[0])
+        points = np.repeat(begin[np.newaxis,:], maxDelta + 1, axis=0)
+        points[:, axis] += np.arange(maxDelta + 1) * np.sign(delta[axis])
+    else:
+        points = delta[np.newaxis,:] * np.arange(maxDelta + 1)[:,np.newaxis] / maxDelta + begin
+        points = np.rint(points).astype(np.int64)
 
     if width > 1:
         minPoint = np.minimum(begin, end)
 
         # convert point array to a map
         array_width = maxDelta + width*2
-        array = np.zeros([array_width]*len(begin), dtype=int)
-        array[tuple(np.transpose(points - minPoint + width))] = 1
+        array = np.zeros([array_width]*len(begin), dtype=bool)
+        array[tuple(np.transpose(points - minPoint + width))] = True
 
         # dilate map (make it thick)
-        if width > 1:
-            array = ndimage.binary_dilation(array, iterations = width - 1)
+        array = ndimage.binary_dilation(array, iterations = width - 1)
 
         # rebuild point array from map
         points = np.argwhere(array) + minPoint - width
@@ -848,7 +875,7 @@ def line2DArray(begin: Vec2iLike, end: Vec2iLike, width: int = 1):
 
 def line2D(begin: Vec2iLike, end: Vec2iLike, width: int = 1):
     """Yields the points on the line between [begin] and [end] (inclusive)"""
-    return (ivec2(*point) for point in _lineArray(begin, end, width))
+    return (ivec2(*point) for point in _lineArray(begin, end, width).tolist())
 
 
 def line3Darray(begin: Vec3iLike, end: Vec3iLike, width: int = 1):
@@ -858,51 +885,87 @@ def line3Darray(begin: Vec3iLike, end: Vec3iLike, width: int = 1):
 
 def line3D(begin: Vec3iLike, end: Vec3iLike, width: int = 1):
     """Yields the points on the line between [begin] and [end] (inclusive)"""
-    return (ivec3(*point) for point in _lineArray(begin, end, width))
+    return (ivec3(*point) for point in _lineArray(begin, end, width).tolist())
 
 
-def lineSequence2D(points: Iterable[Vec2iLike], closed=False):
-    """Yields all points on the lines that connect <points>"""
-    for i in range((-1 if closed else 0), len(points)-1):
-        yield from line2D(points[i], points[i+1])
+def _lineSequenceArray(points: Sequence, closed: bool, dimensions: int):
+    """Returns an (n,<dimensions>) numpy array of the points on the lines that connect <points>,
+    without duplicates, in the order in which they are first encountered."""
+    segments = [_lineArray(points[i], points[i+1]) for i in range((-1 if closed else 0), len(points)-1)]
+    if not segments:
+        return np.zeros((0, dimensions), dtype=np.int64)
+    sequence = np.concatenate(segments)
+    _, firstIndices = np.unique(sequence, axis=0, return_index=True)
+    return sequence[np.sort(firstIndices)]
+
+
+def lineSequence2DArray(points: Sequence[Vec2iLike], closed=False) -> np.ndarray:
+    """Returns an (n,2) numpy array of all points on the lines that connect <points>"""
+    return _lineSequenceArray(points, closed, 2)
 
 
-def lineSequence3D(points: Iterable[Vec3iLike], closed=False):
+def lineSequence2D(points: Sequence[Vec2iLike], closed=False):
     """Yields all points on the lines that connect <points>"""
-    for i in range((-1 if closed else 0), len(points)-1):
-        yield from line3D(points[i], points[i+1])
+    return (ivec2(*point) for point in lineSequence2DArray(points, closed).tolist())
 
 
-def circle(center: Vec2iLike, diameter: int, filled=False):
-    """Yields the points of the specified circle.\n
-    If <diameter> is even, <center> will be the bottom left center point."""
+def lineSequence3DArray(points: Sequence[Vec3iLike], closed=False) -> np.ndarray:
+    """Returns an (n,3) numpy array of all points on the lines that connect <points>"""
+    return _lineSequenceArray(points, closed, 3)
+
+
+def lineSequence3D(points: Sequence[Vec3iLike], closed=False):
+    """Yields all points on the lines that connect <points>"""
+    return (ivec3(*point) for point in lineSequence3DArray(points, closed).tolist())
+
+
+def _unique2DArray(points: np.ndarray) -> np.ndarray:
+    """Returns the unique rows of the (n,2) int64 array <points>, sorted.\n
+    Equivalent to np.unique(points, axis=0), but much faster: each point is first encoded into a
+    single integer."""
+    if len(points) == 0:
+        return points
+    minPoint = points.min(axis=0)
+    height = int(points[:, 1].max() - minPoint[1]) + 1
+    keys = np.unique((points[:, 0] - minPoint[0]) * height + (points[:, 1] - minPoint[1]))
+    return np.stack([keys // height + minPoint[0], keys % height + minPoint[1]], axis=1)
+
+
+def _scanlineFilled2DArray(points: Iterable[Vec2iLike]) -> np.ndarray:
+    """Returns an (n,2) numpy array containing, for every row (y-coordinate) of <points>, all points
+    between the leftmost and the rightmost point in that row.\n
+    For shapes that are convex along the x-axis, such as circles and ellipses, this is equivalent to
+    filling the shape, but it needs no seed point."""
+    points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    if len(points) == 0:
+        return points
+
+    order = np.argsort(points[:, 1], kind="stable")
+    xs = points[order, 0]
+    ys = points[order, 1]
+    rowStarts = np.flatnonzero(np.concatenate([[True], ys[1:] != ys[:-1]]))
+    minXs = np.minimum.reduceat(xs, rowStarts)
+    maxXs = np.maximum.reduceat(xs, rowStarts)
+
+    lengths = maxXs - minXs + 1
+    filledXs = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - minXs, lengths)
+    return np.stack([filledXs, np.repeat(ys[rowStarts], lengths)], axis=1)
+
+
+def _circleOctant(radius: int) -> Tuple[List[int], List[int]]:
+    """Returns the x- and y-coordinates of the points in one octant of the circle with radius
+    <radius>, centered on (0,0), using Bresenham's circle algorithm."""
 
     # With 'inspiration' from:
     # https://www.geeksforgeeks.org/bresenhams-circle-drawing-algorithm/
 
-    center: ivec2 = ivec2(*center)
-
-    if diameter == 0:
-        empty: List[ivec2] = []
-        return (point for point in empty)
+    xs: List[int] = []
+    ys: List[int] = []
 
-    e = 1 - (diameter % 2) # for even centers
-    points: Set[ivec2] = set()
-
-    def eightPoints(x: int, y: int):
-        points.add(center + ivec2(e + x, e + y))
-        points.add(center + ivec2(0 - x, e + y))
-        points.add(center + ivec2(e + x, 0 - y))
-        points.add(center + ivec2(0 - x, 0 - y))
-        points.add(center + ivec2(e + y, e + x))
-        points.add(center + ivec2(0 - y, e + x))
-        points.add(center + ivec2(e + y, 0 - x))
-        points.add(center + ivec2(0 - y, 0 - x))
-
-    radius = (diameter-1) // 2
     x, y = 0, radius
     d = 3 - 2 * radius
-    eightPoints(x, y)
+    xs.append(x)
+    ys.append(y)
     while y >= x:
         # for each pixel we will
         # draw all eight pixels
@@ -917,111 +980,191 @@ def circle(center: Vec2iLike, diameter: int, filled=False):
             d = d + 4 * (x - y) + 10
         else:
             d = d + 4 * x + 6
-        eightPoints(x, y)
+        xs.append(x)
+        ys.append(y)
 
-    if filled:
-        return filled2D(points, center, Rect(center - radius, ivec2(diameter, diameter)))
-    return (point for point in points)
+    return xs, ys
 
 
-def fittingCircle(corner1: Vec2iLike, corner2: Vec2iLike, filled=False):
-    """Yields the points of the largest circle that fits between <corner1> and <corner2>.\n
-    The circle will be centered in the larger axis."""
-    corner1_, corner2_ = orderedCorners2D(corner1, corner2)
-    diameter = min(corner2_ - corner1_) + 1
-    return circle((corner1_ + corner2_) // 2, diameter, filled)
+def circleArray(center: Vec2iLike, diameter: int, filled=False) -> np.ndarray:
+    """Returns an (n,2) numpy array containing the points of the specified circle.\n
+    If <diameter> is even, <center> will be the bottom left center point."""
 
+    if diameter == 0:
+        return np.zeros((0, 2), dtype=np.int64)
 
-def ellipse(center: Vec2iLike, diameters: Vec2iLike, filled=False):
-    """Yields the points of the specified ellipse.\n
-    If <diameter>[axis] is even, <center>[axis] will be the lower center point in that axis."""
+    e = 1 - (diameter % 2) # for even centers
 
-    # Modified version 'inspired' by chandan_jnu from
-    # https://www.geeksforgeeks.org/midpoint-ellipse-drawing-algorithm/
+    # Only the points of one octant are computed; the others follow by symmetry.
+    octantXs, octantYs = _circleOctant((diameter-1) // 2)
+
+    xs = np.array(octantXs, dtype=np.int64)
+    ys = np.array(octantYs, dtype=np.int64)
+    pointArray = _unique2DArray(np.concatenate([
+        np.stack([e + xs, e + ys], axis=1),
+        np.stack([0 - xs, e + ys], axis=1),
+        np.stack([e + xs, 0 - ys], axis=1),
+        np.stack([0 - xs, 0 - ys], axis=1),
+        np.stack([e + ys, e + xs], axis=1),
+        np.stack([0 - ys, e + xs], axis=1),
+        np.stack([e + ys, 0 - xs], axis=1),
+        np.stack([0 - ys, 0 - xs], axis=1),
+    ]))
+    if filled:
+        pointArray = _scanlineFilled2DArray(pointArray)
+    return pointArray + np.array(center, dtype=np.int64)
 
-    center:    ivec2 = ivec2(*center)
-    diameters: ivec2 = ivec2(*diameters)
 
-    if diameters.x == 0 or diameters.y == 0:
-        empty: List[ivec2] = []
-        return (point for point in empty)
+def circle(center: Vec2iLike, diameter: int, filled=False):
+    """Yields the points of the specified circle.\n
+    If <diameter> is even, <center> will be the bottom left center point."""
+    return (ivec2(*point) for point in circleArray(center, diameter, filled).tolist())
 
-    if diameters.x == diameters.y:
-        return circle(center, diameters.x, filled)
 
-    e = 1 - (diameters % 2)
+def fittingCircleArray(corner1: Vec2iLike, corner2: Vec2iLike, filled=False) -> np.ndarray:
+    """Returns an (n,2) numpy array containing the points of the largest circle that fits between
+    <corner1> and <corner2>.\n
+    The circle will be centered in the larger axis."""
+    corner1_, corner2_ = orderedCorners2D(corner1, corner2)
+    diameter = min(corner2_ - corner1_) + 1
+    return circleArray((corner1_ + corner2_) // 2, diameter, filled)
 
-    points: Set[ivec2] = set()
 
-    def fourpoints(x, y):
-        points.add(center + ivec2(e.x + x, e.y + y))
-        points.add(center + ivec2(0   - x, e.y + y))
-        points.add(center + ivec2(e.x + x, 0   - y))
-        points.add(center + ivec2(0   - x, 0   - y))
+def fittingCircle(corner1: Vec2iLike, corner2: Vec2iLike, filled=False):
+    """Yields the points of the largest circle that fits between <corner1> and <corner2>.\n
+    The circle will be centered in the larger axis."""
+    return (ivec2(*point) for point in fittingCircleArray(corner1, corner2, filled).tolist())
 
-        if filled:
-            points.update(line2D(center + ivec2(0 - x, e.y + y), center + ivec2(e.x + x, e.y + y)))
-            points.update(line2D(center + ivec2(0 - x, 0   - y), center + ivec2(e.x + x, 0   - y)))
 
-    rx, ry = (diameters-1) // 2
+def _ellipseQuadrant(rx: int, ry: int) -> Tuple[List[int], List[int]]:
+    """Returns the x- and y-coordinates of the points in the first quadrant of the ellipse with
+    radii <rx> and <ry>, centered on (0,0), using the midpoint ellipse algorithm."""
+
+    # Modified version 'inspired' by chandan_jnu from
+    # https://www.geeksforgeeks.org/midpoint-ellipse-drawing-algorithm/
+    # The decision parameters are multiplied by 4, so that they are always integers.
+
+    xs: List[int] = []
+    ys: List[int] = []
+
+    rx2 = rx * rx
+    ry2 = ry * ry
 
     x, y = 0, ry
 
     # Initial decision parameter of region 1
-    d1 = ((ry * ry) - (rx * rx * ry) + (0.25 * rx * rx))
-    dx = 2 * ry * ry * x
-    dy = 2 * rx * rx * y
+    d1 = 4 * ry2 - 4 * rx2 * ry + rx2
+    dx = 2 * ry2 * x
+    dy = 2 * rx2 * y
 
     # For region 1
     while dx < dy:
-        fourpoints(x, y)
+        xs.append(x)
+        ys.append(y)
 
         # Checking and updating value of
         # decision parameter based on algorithm
         if d1 < 0:
             x += 1
-            dx = dx + (2 * ry * ry)
-            d1 = d1 + dx + (ry * ry)
+            dx = dx + 2 * ry2
+            d1 = d1 + 4 * (dx + ry2)
         else:
             x += 1
             y -= 1
-            dx = dx + (2 * ry * ry)
-            dy = dy - (2 * rx * rx)
-            d1 = d1 + dx - dy + (ry * ry)
+            dx = dx + 2 * ry2
+            dy = dy - 2 * rx2
+            d1 = d1 + 4 * (dx - dy + ry2)
 
     # Decision parameter of region 2
-    d2 = (((ry * ry) * ((x + 0.5) * (x + 0.5)))
-          + ((rx * rx) * ((y - 1) * (y - 1))) - (rx * rx * ry * ry))
+    d2 = ry2 * (2 * x + 1) * (2 * x + 1) + 4 * rx2 * (y - 1) * (y - 1) - 4 * rx2 * ry2
 
     # Plotting points of region 2
     while y >= 0:
-        fourpoints(x, y)
+        xs.append(x)
+        ys.append(y)
 
         # Checking and updating parameter
         # value based on algorithm
         if d2 > 0:
             y -= 1
-            dy = dy - (2 * rx * rx)
-            d2 = d2 + (rx * rx) - dy
+            dy = dy - 2 * rx2
+            d2 = d2 + 4 * (rx2 - dy)
         else:
             y -= 1
             x += 1
-            dx = dx + (2 * ry * ry)
-            dy = dy - (2 * rx * rx)
-            d2 = d2 + dx - dy + (rx * rx)
+            dx = dx + 2 * ry2
+            dy = dy - 2 * rx2
+            d2 = d2 + 4 * (dx - dy + rx2)
 
-    return (point for point in points)
+    return xs, ys
 
 
-def fittingEllipse(corner1: Vec2iLike, corner2: Vec2iLike, filled=False):
-    """Yields the points of the largest ellipse that fits between <corner1> and <corner2>."""
+@lru_cache(maxsize=256)
+def _ellipseOutline(diameterX: int, diameterY: int):
+    """Returns the outline points of the ellipse with the given diameters, centered on (0,0), as a
+    read-only (n,2) numpy array.\n
+    The shape only depends on the diameters, so it is computed once for every distinct ellipse.
+    Only the outline is cached, since it is much smaller than the filled ellipse."""
+
+    diameters = ivec2(diameterX, diameterY)
+
+    if diameters.x == diameters.y:
+        points = circleArray((0, 0), diameters.x)
+        points.flags.writeable = False
+        return points
+
+    e = 1 - (diameters % 2)
+
+    # Only the points of the first quadrant are computed; the others follow by symmetry.
+    rx, ry = (diameters-1) // 2
+    quadrantXs, quadrantYs = _ellipseQuadrant(rx, ry)
+
+    xs = np.array(quadrantXs, dtype=np.int64)
+    ys = np.array(quadrantYs, dtype=np.int64)
+
+    points = _unique2DArray(np.concatenate([
+        np.stack([e.x + xs, e.y + ys], axis=1),
+        np.stack([0   - xs, e.y + ys], axis=1),
+        np.stack([e.x + xs, 0   - ys], axis=1),
+        np.stack([0   - xs, 0   - ys], axis=1),
+    ]))
+
+    points.flags.writeable = False
+    return points
+
+
+def ellipseArray(center: Vec2iLike, diameters: Vec2iLike, filled=False) -> np.ndarray:
+    """Returns an (n,2) numpy array containing the points of the specified ellipse.\n
+    If <diameter>[axis] is even, <center>[axis] will be the lower center point in that axis."""
+    if diameters[0] == 0 or diameters[1] == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    points = _ellipseOutline(int(diameters[0]), int(diameters[1]))
+    if filled:
+        points = _scanlineFilled2DArray(points)
+    return points + np.array(center, dtype=np.int64)
+
+
+def ellipse(center: Vec2iLike, diameters: Vec2iLike, filled=False):
+    """Yields the points of the specified ellipse.\n
+    If <diameter>[axis] is even, <center>[axis] will be the lower center point in that axis."""
+    return (ivec2(*point) for point in ellipseArray(center, diameters, filled).tolist())
+
+
+def fittingEllipseArray(corner1: Vec2iLike, corner2: Vec2iLike, filled=False) -> np.ndarray:
+    """Returns an (n,2) numpy array containing the points of the largest ellipse that fits between
+    <corner1> and <corner2>."""
     _corner1, _corner2 = orderedCorners2D(corner1, corner2)
     diameters = (_corner2 - _corner1) + 1
-    return ellipse((_corner1 + _corner2) // 2, diameters, filled)
+    return ellipseArray((_corner1 + _corner2) // 2, diameters, filled)
 
 
-def cylinder(baseCenter: Vec3iLike, diameters: Union[Vec2iLike, int], length: int, axis=1, tube=False, hollow=False):
-    """Yields the points from the specified cylinder.\n
+def fittingEllipse(corner1: Vec2iLike, corner2: Vec2iLike, filled=False):
+    """Yields the points of the largest ellipse that fits between <corner1> and <corner2>."""
+    return (ivec2(*point) for point in fittingEllipseArray(corner1, corner2, filled).tolist())
+
+
+def cylinderArray(baseCenter: Vec3iLike, diameters: Union[Vec2iLike, int], length: int, axis=1, tube=False, hollow=False) -> np.ndarray:
+    """Returns an (n,3) numpy array containing the points of the specified cylinder.\n
     If a <diameter> is even, <center> will be the lower center point in that axis.\n
     <tube> has precedence over <hollow>."""
 
@@ -1029,50 +1172,67 @@ def cylinder(baseCenter: Vec3iLike, diameters: Union[Vec2iLike, int], length: in
     baseCenter: ivec3 = ivec3(*baseCenter)
 
     if diameters.x == 0 or diameters.y == 0 or length == 0:
-        empty: List[ivec3] = []
-        return (point for point in empty)
+        return np.zeros((0, 3), dtype=np.int64)
 
     corner1 = baseCenter - addDimension((diameters-1)/2, axis, 0)
     corner2 = corner1 + addDimension(diameters-1, axis, length-1)
-    return fittingCylinder(corner1, corner2, axis, tube, hollow)
+    return fittingCylinderArray(corner1, corner2, axis, tube, hollow)
 
 
-def fittingCylinder(corner1: Vec3iLike, corner2: Vec3iLike, axis=1, tube=False, hollow=False):
-    """Yields the points of the largest cylinder that fits between <corner1> and <corner2>.\n
+def cylinder(baseCenter: Vec3iLike, diameters: Union[Vec2iLike, int], length: int, axis=1, tube=False, hollow=False):
+    """Yields the points from the specified cylinder.\n
+    If a <diameter> is even, <center> will be the lower center point in that axis.\n
+    <tube> has precedence over <hollow>."""
+    return (ivec3(*point) for point in cylinderArray(baseCenter, diameters, length, axis, tube, hollow).tolist())
+
+
+def fittingCylinderArray(corner1: Vec3iLike, corner2: Vec3iLike, axis=1, tube=False, hollow=False) -> np.ndarray:
+    """Returns an (n,3) numpy array containing the points of the largest cylinder that fits between
+    <corner1> and <corner2>.\n
     <tube> has precedence over <hollow>."""
 
     _corner1, _corner2 = orderedCorners3D(corner1, corner2)
     dimensionality, flatSides = getDimensionality(_corner1, _corner2)
 
     if dimensionality == 0:
-        yield _corner1
-        return
+        return np.array([_corner1], dtype=np.int64)
 
     if (dimensionality == 1 or (dimensionality == 2 and flatSides[0] != axis)):
-        yield from cuboid3D(_corner1, _corner2)
-        return
+        return cuboid3DArray(_corner1, _corner2)
 
     baseCorner1 = dropDimension(_corner1, axis)
     baseCorner2 = dropDimension(_corner2, axis)
-    h0 = _corner1[axis]
-    hn = _corner2[axis]
 
-    ellipsePoints2D = list(fittingEllipse(baseCorner1, baseCorner2, filled=False))
-    ellipsePoints3D = [addDimension(point, axis, h0) for point in ellipsePoints2D]
+    ellipsePoints2D = fittingEllipseArray(baseCorner1, baseCorner2, filled=False)
+
+    # The cylinder is assembled in a bitmap of its bounding box, with the cylinder axis last.
+    # For small diameters, the ellipse can extend beyond the base corners.
+    mapRect = Rect.bounding(np.concatenate([ellipsePoints2D, [baseCorner1, baseCorner2]]))
+    mapOffset = np.array(mapRect.offset)
+
+    ellipseMap = np.zeros(mapRect.size, dtype=np.uint8)
+    ellipseMap[tuple(np.transpose(ellipsePoints2D - mapOffset))] = 1
 
     if tube:
-        basePoints = ellipsePoints3D
-        bodyPoints = ellipsePoints3D
+        baseMap = ellipseMap
     else:
-        basePoints = [addDimension(point, axis, h0) for point in filled2D(ellipsePoints2D, (baseCorner1 + baseCorner2) // 2, Rect.between(baseCorner1, baseCorner2))]
-        bodyPoints = ellipsePoints3D if hollow else basePoints
-
-    yield from basePoints
-    if hn != h0:
-        direction = ivec3(0,0,0)
-        direction[axis] = 1
-        yield from (point + (hn - h0)*direction for point in basePoints)
-        yield from (point + i*direction for i in range(1, hn-h0) for point in bodyPoints)
+        baseMap = np.zeros(mapRect.size, dtype=np.uint8)
+        filledPoints = fittingEllipseArray(baseCorner1, baseCorner2, filled=True)
+        baseMap[tuple(np.transpose(filledPoints - mapOffset))] = 1
+    bodyMap = ellipseMap if hollow else baseMap
+
+    volume = np.empty((*mapRect.size, _corner2[axis] - _corner1[axis] + 1), dtype=np.uint8)
+    volume[:, :, 1:-1] = bodyMap[:, :, np.newaxis]
+    volume[:, :, 0]  = baseMap
+    volume[:, :, -1] = baseMap
+
+    return np.argwhere(np.moveaxis(volume, 2, axis)) + np.array(addDimension(mapRect.offset, axis, _corner1[axis]))
+
+
+def fittingCylinder(corner1: Vec3iLike, corner2: Vec3iLike, axis=1, tube=False, hollow=False):
+    """Yields the points of the largest cylinder that fits between <corner1> and <corner2>.\n
+    <tube> has precedence over <hollow>."""
+    return (ivec3(*point) for point in fittingCylinderArray(corner1, corner2, axis, tube, hollow).tolist())
 
 
 def ellipsoid(center: Vec3iLike, diameters: Vec3iLike, hollow: bool = False):
@@ -1,23 +1,38 @@
 """Provides the WorldSlice class"""
 
-from typing import Dict, Iterable, Optional
-from dataclasses import dataclass
-from io import BytesIO
+from typing import Dict, Iterable, Optional, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
 from math import floor, ceil, log2
 
 from glm import ivec2, ivec3
 from nbt import nbt
 import numpy as np
 
-from .vector_tools import Vec3iLike, addY, loop2D, loop3D, trueMod2D, Rect
+from .vector_tools import Vec3iLike, loop2D, trueMod2D, Rect
 from .block import Block
 from . import interface
+from .chunk_cache import ChunkCache, getChunkTags
+from .nbt_tools import parseNbtStream
 
 
 # Chunk format information:
 # https://minecraft.fandom.com/wiki/Chunk_format
 
 
+@lru_cache(maxsize=None)
+def _bitArrayDecodeTables(bitsPerEntry: int, logicalArraySize: int):
+    """Returns the long index and bit shift of every entry of a _BitArray with the given metrics.\n
+    There are only a few distinct metrics, so these are computed once and shared."""
+    entriesPerLong = 64 // bitsPerEntry
+    indices = np.arange(logicalArraySize)
+    longIndices = indices // entriesPerLong
+    shifts = ((indices - longIndices * entriesPerLong) * bitsPerEntry).astype(np.uint64)
+    longIndices.flags.writeable = False
+    shifts.flags.writeable = False
+    return longIndices, shifts
+
+
 class _BitArray:
     """Store an array of binary values and its metrics.
 
@@ -32,12 +47,15 @@ class _BitArray:
         self._entriesPerLong   = 64 // bitsPerEntry
         self._maxEntryValue    = (1 << bitsPerEntry) - 1
         if data is None:
-            self.longArray = []
+            self.longArray = np.zeros(0, dtype=np.uint64)
         else:
             expectedLongCount = floor((logicalArraySize + self._entriesPerLong - 1) / self._entriesPerLong)
             if len(data) != expectedLongCount:
                 raise ValueError(f"Invalid data length: got {len(data)} but expected {expectedLongCount}")
-            self.longArray = data
+            # The longs are stored in one contiguous array instead of a list of Python ints. They
+            # are reinterpreted as unsigned, so that shifting does not sign-extend.
+            longs = data.value if isinstance(data, nbt.TAG_Long_Array) else data
+            self.longArray = np.array(longs, dtype=np.int64).view(np.uint64)
 
     def __repr__(self):
         """Represents the BitArray as a constructor."""
@@ -50,7 +68,7 @@ class _BitArray:
         if len(self.longArray) == 0:
             return 0
         longIndex = index // self._entriesPerLong
-        long = self.longArray[longIndex]
+        long = int(self.longArray[longIndex])
         k = (index - longIndex * self._entriesPerLong) * self._bitsPerEntry
         return long >> k & self._maxEntryValue
 
@@ -58,6 +76,13 @@ class _BitArray:
         """Returns the logical array size."""
         return self._logicalArraySize
 
+    def toNumpy(self) -> np.ndarray:
+        """Returns all stored values as a numpy array of length len(self)."""
+        if len(self.longArray) == 0:
+            return np.zeros(self._logicalArraySize, dtype=np.int64)
+        longIndices, shifts = _bitArrayDecodeTables(self._bitsPerEntry, self._logicalArraySize)
+        return ((self.longArray[longIndices] >> shifts) & np.uint64(self._maxEntryValue)).astype(np.int64)
+
 
 @dataclass
 class _ChunkSection:
@@ -68,18 +93,49 @@ class _ChunkSection:
     biomesPalette:       nbt.TAG_List
     biomesBitArray:      _BitArray
 
+    # Decoded palette indices and block ids; computed on first use.
+    _blockPaletteIndices: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _biomePaletteIndices: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _blockPaletteIds:     Optional[np.ndarray] = field(default=None, init=False, repr=False)
+
+    @property
+    def blockPaletteIndices(self) -> np.ndarray:
+        """The block palette index of each of the 16*16*16 blocks in this section."""
+        if self._blockPaletteIndices is None:
+            self._blockPaletteIndices = self.blockStatesBitArray.toNumpy().astype(np.uint16)
+        return self._blockPaletteIndices
+
+    @property
+    def biomePaletteIndices(self) -> np.ndarray:
+        """The biome palette index of each of the 4*4*4 biome groups in this section."""
+        if self._biomePaletteIndices is None:
+            self._biomePaletteIndices = self.biomesBitArray.toNumpy().astype(np.uint16)
+        return self._biomePaletteIndices
+
+    @property
+    def blockPaletteIds(self) -> np.ndarray:
+        """The namespaced block id of each entry of the block palette, as an array of strings."""
+        if self._blockPaletteIds is None:
+            self._blockPaletteIds = np.array([str(tag["Name"]) for tag in self.blockPalette.tags], dtype=object)
+        return self._blockPaletteIds
+
     def getBlockStateTagAtIndex(self, index) -> nbt.TAG_Compound:
-        return self.blockPalette[self.blockStatesBitArray[index]]
+        return self.blockPalette[int(self.blockPaletteIndices[index])]
 
     def getBiomeAtIndex(self, index) -> nbt.TAG_String:
-        return self.biomesPalette[self.biomesBitArray[index]]
+        return self.biomesPalette[int(self.biomePaletteIndices[index])]
 
 
 class WorldSlice:
     """Contains information on a slice of the world."""
 
-    def __init__(self, rect: Rect, dimension: Optional[str] = None, heightmapTypes: Optional[Iterable[str]] = None, retries=0, timeout=None, host=interface.DEFAULT_HOST):
-        """Initialise WorldSlice with region and heightmap."""
+    def __init__(self, rect: Rect, dimension: Optional[str] = None, heightmapTypes: Optional[Iterable[str]] = None, retries=0, timeout=None, host=interface.DEFAULT_HOST, chunkCache: Optional[ChunkCache] = None, parallelRequests = 1):
+        """Initialise WorldSlice with region and heightmap.\n
+        If <chunkCache> is given, chunks are taken from it when possible, and retrieved chunks are
+        added to it.\n
+        If <parallelRequests> is larger than one, the chunks are retrieved with up to that many
+        concurrent requests (see chunk_cache.getChunkTags()). This is ignored if <chunkCache> is
+        given; use its parallelRequests setting instead."""
 
         # To protect from calling this with a Box, which can lead to very confusing bugs.
         if not isinstance(rect, Rect):
@@ -99,17 +155,23 @@ class WorldSlice:
             ((self._rect.last) >> 4) - (self._rect.offset >> 4) + 1
         )
 
-        chunkBytes = interface.getChunks(self._chunkRect.offset, self._chunkRect.size, dimension=dimension, asBytes=True, retries=retries, timeout=timeout, host=host)
-        chunkBuffer = BytesIO(chunkBytes)
-
-        self._nbt = nbt.NBTFile(buffer=chunkBuffer)
+        if chunkCache is None and parallelRequests <= 1:
+            with interface.getChunksStream(self._chunkRect.offset, self._chunkRect.size, dimension=dimension, retries=retries, timeout=timeout, host=host) as chunkStream:
+                self._nbt = parseNbtStream(chunkStream)
+        else:
+            chunksTag = nbt.TAG_List(name="Chunks", type=nbt.TAG_Compound)
+            if chunkCache is None:
+                chunksTag.tags = getChunkTags(self._chunkRect, dimension=dimension, parallelRequests=parallelRequests, retries=retries, timeout=timeout, host=host)
+            else:
+                chunksTag.tags = chunkCache.getChunks(self._chunkRect, dimension=dimension, retries=retries, timeout=timeout, host=host)
+            self._nbt = nbt.NBTFile()
+            self._nbt.name = ""
+            self._nbt.tags.append(chunksTag)
 
         self._heightmaps: Dict[str, np.ndarray] = {}
         for hmName in heightmapTypes:
             self._heightmaps[hmName] = np.zeros(self._rect.size, dtype=int)
 
-        self._sections: Dict[ivec3, _ChunkSection] = {}
-
         self._blockEntities: Dict[ivec3, nbt.TAG_Compound] = {}
 
         inChunkRectOffset = trueMod2D(self._rect.offset, 16)
@@ -118,49 +180,78 @@ class WorldSlice:
         self._yBegin = 16 * int(self._nbt["Chunks"][0]["yPos"].value)
         self._ySize  = 16 * len(self._nbt["Chunks"][0]["sections"])
 
+        # The chunk sections are stored in a dense array, indexed by [x][y - sectionYBegin][z] in
+        # local chunk coordinates. Missing sections are None.
+        sectionYs = [int(sectionTag['Y'].value) for sectionTag in self._nbt["Chunks"][0]["sections"]]
+        self._sectionYBegin = min(sectionYs, default=self._yBegin >> 4)
+        sectionYSize = max(sectionYs, default=self._sectionYBegin - 1) - self._sectionYBegin + 1
+        self._rectOffset = (self._rect.offset.x, self._rect.offset.y)
+        self._sectionsOffset = (self._chunkRect.offset.x, self._sectionYBegin, self._chunkRect.offset.y)
+        self._sectionsShape  = (self._chunkRect.size.x,   sectionYSize,        self._chunkRect.size.y)
+        self._sections = np.full(self._sectionsShape, None, dtype=object)
+
+        # Lookups that do not depend on the chunk are hoisted out of the loop.
+        chunksTag = self._nbt['Chunks']
+        chunkRectSizeX = self._chunkRect.size.x
+        heightmaps = [(hmName, self._heightmaps[hmName]) for hmName in heightmapTypes]
+        rectSize = self._rect.size
+        yBegin = self._yBegin
+        sections = self._sections
+        sectionYBegin = self._sectionYBegin
+
         # Loop through chunks
         for chunkPos in loop2D(self._chunkRect.size):
-            chunkID = chunkPos.x + chunkPos.y * self._chunkRect.size.x
-            chunkTag = self._nbt['Chunks'][chunkID]
+            chunkID = chunkPos.x + chunkPos.y * chunkRectSizeX
+            chunkTag = chunksTag[chunkID]
 
             # Read heightmaps
+            # The part of this chunk that lies inside the heightmaps, in heightmap coordinates and
+            # in chunk-local coordinates.
+            hmBegin = chunkPos * 16 - inChunkRectOffset
+            hmFirst = ivec2(max(hmBegin.x, 0), max(hmBegin.y, 0))
+            hmEnd   = ivec2(min(hmBegin.x + 16, rectSize.x), min(hmBegin.y + 16, rectSize.y))
+            inChunkFirst = hmFirst - hmBegin
+            inChunkEnd   = hmEnd   - hmBegin
             heightmapsTag = chunkTag['Heightmaps']
-            for hmName in heightmapTypes:
+            for hmName, heightmap in heightmaps:
                 hmRaw = heightmapsTag[hmName]
                 hmBitArray = _BitArray(9, 16*16, hmRaw)
-                heightmap = self._heightmaps[hmName]
-                for inChunkPos in loop2D(ivec2(16,16)):
-                    try:
-                        # In the heightmap data, the lowest point is encoded as 0, while since
-                        # Minecraft 1.18 the actual lowest y position is below zero. We subtract
-                        # yBegin from the heightmap value to compensate for this difference.
-                        hmPos = -inChunkRectOffset + chunkPos * 16 + inChunkPos # pylint: disable=invalid-unary-operand-type
-                        heightmap[hmPos.x, hmPos.y] = hmBitArray[inChunkPos.y * 16 + inChunkPos.x] + self._yBegin
-                    except IndexError:
-                        pass
+                # The heightmap data is indexed as [z*16 + x]; we transpose it to [x][z].
+                # In the heightmap data, the lowest point is encoded as 0, while since Minecraft
+                # 1.18 the actual lowest y position is below zero. We add yBegin to the heightmap
+                # values to compensate for this difference.
+                hmChunk = hmBitArray.toNumpy().reshape(16, 16).T + yBegin
+                heightmap[hmFirst.x:hmEnd.x, hmFirst.y:hmEnd.y] = \
+                    hmChunk[inChunkFirst.x:inChunkEnd.x, inChunkFirst.y:inChunkEnd.y]
 
             # Read chunk sections
             for sectionTag in chunkTag['sections']:
-                y = int(sectionTag['Y'].value)
+                y = int(sectionTag['Y'].value) - sectionYBegin
 
-                if (not ('block_states' in sectionTag) or len(sectionTag['block_states']) == 0):
+                if not 'block_states' in sectionTag:
+                    continue
+                blockStatesTag = sectionTag['block_states']
+                if len(blockStatesTag) == 0:
+                    continue
+                if not 0 <= y < sectionYSize:
                     continue
 
-                blockPalette = sectionTag['block_states']['palette']
+                blockPalette = blockStatesTag['palette']
                 blockData = None
-                if 'data' in sectionTag['block_states']:
-                    blockData = sectionTag['block_states']['data']
+                if 'data' in blockStatesTag:
+                    blockData = blockStatesTag['data']
                 blockPaletteBitsPerEntry = max(4, ceil(log2(len(blockPalette))))
                 blockDataBitArray = _BitArray(blockPaletteBitsPerEntry, 16*16*16, blockData)
 
-                biomesPalette = sectionTag['biomes']['palette']
+                biomesTag = sectionTag['biomes']
+                biomesPalette = biomesTag['palette']
                 biomesData = None
-                if 'data' in sectionTag['biomes']:
-                    biomesData = sectionTag['biomes']['data']
+                if 'data' in biomesTag:
+                    biomesData = biomesTag['data']
                 biomesBitsPerEntry = max(1, ceil(log2(len(biomesPalette))))
                 biomesDataBitArray = _BitArray(biomesBitsPerEntry, 64, biomesData)
 
-                self._sections[addY(chunkPos, y)] = _ChunkSection(
+                sections[chunkPos.x, y, chunkPos.y] = _ChunkSection(
                     blockPalette, blockDataBitArray, biomesPalette, biomesDataBitArray
                 )
 
@@ -221,18 +312,40 @@ class WorldSlice:
         return self._heightmaps
 
 
+    def _toGlobal(self, position: Vec3iLike) -> Tuple[int, int, int]:
+        """Converts the local <position> to global coordinates, without creating glm vectors."""
+        offsetX, offsetZ = self._rectOffset
+        return (position[0] + offsetX, position[1], position[2] + offsetZ)
+
+
+    def _chunkSectionPositionGlobal(self, blockPosition: Vec3iLike) -> Tuple[int, int, int]:
+        """Like getChunkSectionPositionGlobal(), but returns a tuple of ints."""
+        offsetX, _, offsetZ = self._sectionsOffset
+        return (
+            (blockPosition[0] >> 4) - offsetX,
+             blockPosition[1] >> 4,
+            (blockPosition[2] >> 4) - offsetZ
+        )
+
     def getChunkSectionPositionGlobal(self, blockPosition: Vec3iLike) -> ivec3:
         """Returns the local position of the chunk section that contains the global <blockPosition>."""
-        return (ivec3(*blockPosition) >> 4) - addY(self._chunkRect.offset)
+        return ivec3(*self._chunkSectionPositionGlobal(blockPosition))
 
     def getChunkSectionPosition(self, blockPosition: Vec3iLike):
         """Returns the local position of the chunk section that contains the local <blockPosition>."""
-        return self.getChunkSectionPositionGlobal(ivec3(*blockPosition) + addY(self._rect.offset))
+        return ivec3(*self._chunkSectionPositionGlobal(self._toGlobal(blockPosition)))
 
 
-    def _getChunkSectionGlobal(self, blockPosition: Vec3iLike):
-        """Returns the chunk section that contains the global <blockPosition>."""
-        return self._sections.get(self.getChunkSectionPositionGlobal(blockPosition))
+    def _getChunkSectionGlobal(self, blockPosition: Vec3iLike) -> Optional[_ChunkSection]:
+        """Returns the chunk section that contains the global <blockPosition>, or None if there is
+        no such section in this WorldSlice."""
+        x, y, z = self._chunkSectionPositionGlobal(blockPosition)
+        y -= self._sectionsOffset[1]
+        sizeX, sizeY, sizeZ = self._sectionsShape
+        # Explicit bounds checks, since negative indices would wrap around.
+        if 0 <= x < sizeX and 0 <= y < sizeY and 0 <= z < sizeZ:
+            return self._sections[x, y, z]
+        return None
 
 
     def getBlockStateTagGlobal(self, position: Vec3iLike):
@@ -241,17 +354,13 @@ class WorldSlice:
         chunkSection = self._getChunkSectionGlobal(position)
         if chunkSection is None:
             return None
-        blockIndex = (
-            (position[1] % 16) * 16 * 16 +
-            (position[2] % 16) * 16 +
-            (position[0] % 16)
-        )
+        blockIndex = ((position[1] & 15) << 8) | ((position[2] & 15) << 4) | (position[0] & 15)
         return chunkSection.getBlockStateTagAtIndex(blockIndex)
 
     def getBlockStateTag(self, position: Vec3iLike):
         """Returns the block state compound tag at local <position>.\n
         If <position> is not contained in this WorldSlice, returns None."""
-        return self.getBlockStateTagGlobal(ivec3(*position) + addY(self._rect.offset))
+        return self.getBlockStateTagGlobal(self._toGlobal(position))
 
 
     def getBlockGlobal(self, position: Vec3iLike):
@@ -266,7 +375,61 @@ class WorldSlice:
     def getBlock(self, position: Vec3iLike):
         """Returns the block at local <position>.\n
         If <position> is not contained in this WorldSlice, returns Block("minecraft:void_air")."""
-        return self.getBlockGlobal(ivec3(*position) + addY(self._rect.offset))
+        return self.getBlockGlobal(self._toGlobal(position))
+
+
+    def getBlockIdsGlobal(self, positions: np.ndarray) -> np.ndarray:
+        """Returns the namespaced ids of the blocks at the global <positions>.\n
+        <positions> should be an array-like of shape (N, 3) of integer block coordinates. Returns an
+        array of N strings (with dtype object).\n
+        For positions that are not contained in this WorldSlice, the id is "minecraft:void_air".\n
+        This is much faster than calling getBlockGlobal() for each position, since the positions
+        are grouped by chunk section and each section is indexed only once."""
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        blockIds = np.full(len(positions), "minecraft:void_air", dtype=object)
+
+        x, y, z = positions[:, 0], positions[:, 1], positions[:, 2]
+        offsetX, offsetY, offsetZ = self._sectionsOffset
+        sizeX,   sizeY,   sizeZ   = self._sectionsShape
+        sectionX = (x >> 4) - offsetX
+        sectionY = (y >> 4) - offsetY
+        sectionZ = (z >> 4) - offsetZ
+        inside = (
+            (sectionX >= 0) & (sectionX < sizeX) &
+            (sectionY >= 0) & (sectionY < sizeY) &
+            (sectionZ >= 0) & (sectionZ < sizeZ)
+        )
+        positionIndices = np.flatnonzero(inside)
+        sectionIndices = np.ravel_multi_index(
+            (sectionX[positionIndices], sectionY[positionIndices], sectionZ[positionIndices]),
+            self._sectionsShape
+        )
+        blockIndices = ((y[positionIndices] & 15) << 8) | ((z[positionIndices] & 15) << 4) | (x[positionIndices] & 15)
+
+        # Group the positions by section.
+        order = np.argsort(sectionIndices, kind="stable")
+        sectionIndices = sectionIndices[order]
+        positionIndices = positionIndices[order]
+        blockIndices = blockIndices[order]
+        uniqueSectionIndices, groupStarts = np.unique(sectionIndices, return_index=True)
+        groupEnds = np.append(groupStarts[1:], len(sectionIndices))
+
+        sectionsFlat = self._sections.reshape(-1)
+        for sectionIndex, groupStart, groupEnd in zip(uniqueSectionIndices.tolist(), groupStarts.tolist(), groupEnds.tolist()):
+            chunkSection: Optional[_ChunkSection] = sectionsFlat[sectionIndex]
+            if chunkSection is None:
+                continue
+            paletteIndices = chunkSection.blockPaletteIndices[blockIndices[groupStart:groupEnd]]
+            blockIds[positionIndices[groupStart:groupEnd]] = chunkSection.blockPaletteIds[paletteIndices]
+
+        return blockIds
+
+    def getBlockIds(self, positions: np.ndarray) -> np.ndarray:
+        """Returns the namespaced ids of the blocks at the local <positions>.\n
+        See getBlockIdsGlobal() for details."""
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        offsetX, offsetZ = self._rectOffset
+        return self.getBlockIdsGlobal(positions + np.array([offsetX, 0, offsetZ]))
 
 
     def getBiomeGlobal(self, position: Vec3iLike):
@@ -279,12 +442,11 @@ class WorldSlice:
             return ""
         # Constrain pos to inside this chunk, then shift 2 bits since biome data is encoded
         # in 64 groups of 4x4x4 per chunk.
-        biomePos = ivec3(
-            (position[0] % 16) >> 2,
-            (position[1] % 16) >> 2,
-            (position[2] % 16) >> 2
+        biomeIndex = (
+            (((position[1] & 15) >> 2) << 4) |
+            (((position[2] & 15) >> 2) << 2) |
+             ((position[0] & 15) >> 2)
         )
-        biomeIndex = (biomePos.y << 4) | (biomePos.z << 2) | biomePos.x # pylint: disable=unsupported-binary-operation
         return str(chunkSection.getBiomeAtIndex(biomeIndex).value)
 
     def getBiome(self, position: Vec3iLike):
@@ -292,7 +454,7 @@ class WorldSlice:
         If <position> is not contained in this WorldSlice, returns an empty string.\n
         Note that Minecraft stores biomes in groups of 4x4x4 blocks. This function returns the
         biome of <position>'s group."""
-        return self.getBiomeGlobal(ivec3(*position) + addY(self._rect.offset))
+        return self.getBiomeGlobal(self._toGlobal(position))
 
 
     def getBiomeCountsInChunkGlobal(self, position: Vec3iLike):
@@ -303,11 +465,11 @@ class WorldSlice:
         chunkSection = self._getChunkSectionGlobal(position)
         if chunkSection is None:
             return None
-        biomeCounts: Dict[str, int] = dict()
-        for biomePos in loop3D(ivec3(4,4,4)):
-            biomeIndex = (biomePos.y << 4) | (biomePos.z << 2) | biomePos.x
-            biome = str(chunkSection.getBiomeAtIndex(biomeIndex).value)
-            biomeCounts[biome] = biomeCounts.get(biome, 0) + 1
+        paletteIndices, counts = np.unique(chunkSection.biomePaletteIndices, return_counts=True)
+        biomeCounts: Dict[str, int] = {
+            str(chunkSection.biomesPalette[paletteIndex].value): count
+            for paletteIndex, count in zip(paletteIndices.tolist(), counts.tolist())
+        }
         return biomeCounts
 
     def getBiomeCountsInChunk(self, position: Vec3iLike):
@@ -315,17 +477,20 @@ class WorldSlice:
         If <position> is not contained in this WorldSlice, returns None.\n
         Minecraft stores biomes in groups of 4x4x4 blocks. The returned dict maps the namespaced id
         of a biome to the number of groups with that biome in the chunk."""
-        return self.getBiomeCountsInChunkGlobal(ivec3(*position) + addY(self._rect.offset))
+        return self.getBiomeCountsInChunkGlobal(self._toGlobal(position))
 
 
     def getPrimaryBiomeInChunkGlobal(self, position: Vec3iLike):
         """Returns the most prevalent biome in the same chunk as the global <position>.\n
         If <position> is not contained in this WorldSlice, returns None."""
-        foundBiomes = self.getBiomeCountsInChunkGlobal(position)
-        biome: str = max(foundBiomes.keys(), key=foundBiomes.get)
+        chunkSection = self._getChunkSectionGlobal(position)
+        if chunkSection is None:
+            return None
+        paletteIndices, counts = np.unique(chunkSection.biomePaletteIndices, return_counts=True)
+        biome = str(chunkSection.biomesPalette[int(paletteIndices[counts.argmax()])].value)
         return biome
 
     def getPrimaryBiomeInChunk(self, position: Vec3iLike):
         """Returns the most prevalent biome in the same chunk as the local <position>.\n
         If <position> is not contained in this WorldSlice, returns None."""
-        return self.getPrimaryBiomeInChunkGlobal(ivec3(*position) + addY(self._rect.offset))
+        return self.getPrimaryBiomeInChunkGlobal(self._toGlobal(position))